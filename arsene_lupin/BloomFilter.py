@@ -0,0 +1,61 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+  """
+  BloomFilter: a set of strings that takes the same memory whether it holds ten or a million of them.
+  It never forgets a string it was given, but may claim, about error_rate of the time, to have
+  seen one it wasn't given. Past capacity, that happens more and more often.
+  :param capacity: (int) how many strings it's sized for, defaults to 1,000,000.
+  :param error_rate: (float) how often it may be wrong at capacity, defaults to 0.0001.
+  """
+  def __init__(self, capacity=1000000, error_rate=0.0001):
+    if capacity <= 0 or not 0 < error_rate < 1:
+      raise ValueError("capacity has to be positive and error_rate between 0 and 1.")
+    self.capacity = capacity
+    self.error_rate = error_rate
+    self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    self.hashes = max(1, round(self.size / capacity * math.log(2)))
+    self.count = 0
+    self._bits = bytearray((self.size + 7) // 8)
+
+  def __repr__(self):
+    return """
+BloomFilter(
+  <capacity = {o.capacity}>
+  <error rate = {o.error_rate}>
+  <bits = {o.size}>
+  <hashes = {o.hashes}>
+  <count = {o.count}>
+)
+    """.format(o=self)
+
+  def __len__(self):
+    return self.count
+
+  def _positions(self, item):
+    # two hashes out of one digest, combined into as many as needed.
+    digest = hashlib.blake2b(item.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "little")
+    second = int.from_bytes(digest[8:], "little") | 1
+    return [(first + i * second) % self.size for i in range(self.hashes)]
+
+  def __contains__(self, item):
+    return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+  def add(self, item):
+    """
+    add: remember the string.
+    :param item: (str) the string.
+    :return: (bool) True when it wasn't there yet
+    """
+    new = False
+    for position in self._positions(item):
+      mask = 1 << (position & 7)
+      if not self._bits[position >> 3] & mask:
+        self._bits[position >> 3] |= mask
+        new = True
+    if new is True:
+      self.count += 1
+    return new
@@ -0,0 +1,196 @@
+import json
+import math
+
+from requests.adapters import HTTPAdapter
+from threading import Lock, local
+from time import perf_counter
+from urllib.parse import urlparse
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+_connect_times = local()
+
+
+def pop_connect_seconds():
+  """
+  pop_connect_seconds: the seconds this thread spent opening connections, DNS, TCP and TLS included,
+  since it last asked. A request over a kept-alive connection costs none.
+  """
+  seconds = getattr(_connect_times, "seconds", 0.0)
+  _connect_times.seconds = 0.0
+  return seconds
+
+
+class TimedHTTPConnection(HTTPConnection):
+  def connect(self):
+    start = perf_counter()
+    try:
+      super().connect()
+    finally:
+      _connect_times.seconds = getattr(_connect_times, "seconds", 0.0) + perf_counter() - start
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+  def connect(self):
+    start = perf_counter()
+    try:
+      super().connect()
+    finally:
+      _connect_times.seconds = getattr(_connect_times, "seconds", 0.0) + perf_counter() - start
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+  ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+  ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+  """
+  TimedHTTPAdapter: an HTTPAdapter whose connections keep count of how long they took to open.
+  """
+  def init_poolmanager(self, *args, **kwargs):
+    super().init_poolmanager(*args, **kwargs)
+    self.poolmanager.pool_classes_by_scheme = {
+      "http": TimedHTTPConnectionPool,
+      "https": TimedHTTPSConnectionPool,
+    }
+
+
+def percentile(values, fraction):
+  """
+  percentile: the nearest-rank percentile of the values.
+  :param values: (list) the values, sorted.
+  :param fraction: (float) such as 0.9 for the 90th percentile.
+  :return: (float) the percentile, 0.0 without values
+  """
+  if len(values) == 0:
+    return 0.0
+  return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+
+class DownloadMetrics:
+  """
+  DownloadMetrics: one record per download, with its connect time, time to first byte, bytes,
+  throughput and retries, and a summary of all of them. It's safe to share between threads.
+  """
+  FIELDS = ("connect", "ttfb", "seconds", "mb_per_second")
+
+  def __init__(self):
+    self.records = list()
+    self._lock = Lock()
+
+  def __repr__(self):
+    return """
+DownloadMetrics(
+  <downloads = {downloads}>
+  <failed = {failed}>
+  <bytes = {total_bytes}>
+)
+    """.format(
+      downloads=len(self.records),
+      failed=sum(1 for r in self.records if not r["ok"]),
+      total_bytes=sum(r["bytes"] for r in self.records)
+    )
+
+  def record(self, url, status=None, connect=0.0, ttfb=0.0, seconds=0.0, transfer=0.0, total_bytes=0,
+             retries=0, error=None):
+    """
+    record: keep the numbers of one download.
+    :param url: (str) the URL.
+    :param status: (int) the status of the last response.
+    :param connect: (float) the seconds spent opening connections.
+    :param ttfb: (float) the seconds until the headers of the last response came in.
+    :param seconds: (float) the seconds the download took, retries included.
+    :param transfer: (float) the seconds spent reading the body of the last response.
+    :param total_bytes: (int) the bytes written.
+    :param retries: (int) how many times it was tried again.
+    :param error: (str) what went wrong, None when it didn't.
+    :return: None
+    """
+    record = {
+      "url": url,
+      "host": urlparse(url).netloc,
+      "status": status,
+      "ok": error is None,
+      "error": error,
+      "connect": connect,
+      "ttfb": ttfb,
+      "seconds": seconds,
+      "bytes": total_bytes,
+      "mb_per_second": total_bytes / (1 << 20) / transfer if transfer > 0 else 0.0,
+      "retries": retries,
+    }
+    with self._lock:
+      self.records.append(record)
+
+  def percentiles(self, fractions=(0.5, 0.9, 0.99)):
+    """
+    percentiles: the percentiles of every field, over the downloads that got through.
+    :return: (dict) field -> {fraction: value}
+    """
+    records = [r for r in self.records if r["ok"]]
+    summary = dict()
+    for field in self.FIELDS:
+      values = sorted(r[field] for r in records if field != "mb_per_second" or r["bytes"] > 0)
+      summary[field] = {fraction: percentile(values, fraction) for fraction in fractions}
+    return summary
+
+  def slowest_hosts(self, top=5):
+    """
+    slowest_hosts: the hosts with the lowest throughput.
+    :return: (list) of {"host", "downloads", "bytes", "seconds", "ttfb", "mb_per_second", "retries"}
+    """
+    hosts = dict()
+    for r in self.records:
+      host = hosts.setdefault(r["host"], {
+        "host": r["host"], "downloads": 0, "bytes": 0, "seconds": 0.0, "ttfb": 0.0, "retries": 0
+      })
+      host["downloads"] += 1
+      host["bytes"] += r["bytes"]
+      host["seconds"] += r["seconds"]
+      host["ttfb"] += r["ttfb"]
+      host["retries"] += r["retries"]
+    for host in hosts.values():
+      host["ttfb"] /= host["downloads"]
+      host["mb_per_second"] = host["bytes"] / (1 << 20) / host["seconds"] if host["seconds"] > 0 else 0.0
+    return sorted(hosts.values(), key=lambda h: h["mb_per_second"])[:top]
+
+  def write(self, metrics_file):
+    """
+    write: every record as a json line.
+    """
+    with open(metrics_file, "w") as metrics_fh:
+      for r in self.records:
+        metrics_fh.write(json.dumps(r) + "\n")
+
+  def show(self, top=5):
+    downloads = len(self.records)
+    ok = [r for r in self.records if r["ok"]]
+    print("\n{ok} of {downloads} downloads succeeded, {mb:.1f}MB, {retries} retries, {reused} over kept-alive connections.".format(
+      ok=len(ok),
+      downloads=downloads,
+      mb=sum(r["bytes"] for r in ok) / (1 << 20),
+      retries=sum(r["retries"] for r in self.records),
+      reused=sum(1 for r in ok if r["connect"] == 0.0)
+    ))
+    if len(ok) == 0:
+      return
+    print("{field:>14} {p50:>10} {p90:>10} {p99:>10}".format(field="", p50="p50", p90="p90", p99="p99"))
+    for field, values in self.percentiles().items():
+      unit = "MB/s" if field == "mb_per_second" else "ms"
+      scale = 1 if field == "mb_per_second" else 1000
+      print("{field:>14} {p50:>10} {p90:>10} {p99:>10}".format(
+        field=field,
+        **{name: f"{values[f] * scale:.1f}{unit}" for name, f in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))}
+      ))
+    print("\nslowest hosts:")
+    for host in self.slowest_hosts(top=top):
+      print("{h[host]:>30}: {h[downloads]:5d} downloads, {mb_per_second:8.1f}MB/s, ttfb {ttfb:.1f}ms, {h[retries]} retries".format(
+        h=host,
+        mb_per_second=host["mb_per_second"],
+        ttfb=host["ttfb"] * 1000
+      ))
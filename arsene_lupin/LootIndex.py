@@ -0,0 +1,218 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+
+from datetime import datetime, timezone
+from threading import Lock, get_ident
+
+
+READ_SIZE = 1 << 20
+
+
+class LootIndex:
+  """
+  LootIndex: remembers every URL grabbed so far, with its ETag, Last-Modified, and content hash.
+  The content is kept once under its sha256 in loot_dir/objects, and hard linked under every name
+  it was asked for, so the same picture served by two mirrors takes the room of one, and two
+  pictures sharing a name don't overwrite each other: the second one becomes stem-<hash8>.ext.
+  It's safe to share between threads.
+  :param loot_dir: (str) where to keep the index and the objects, defaults to .loot.
+  """
+  def __init__(self, loot_dir=".loot"):
+    self.loot_dir = loot_dir
+    self.objects_dir = os.path.join(self.loot_dir, "objects")
+    self.parts_dir = os.path.join(self.loot_dir, "parts")
+    os.makedirs(self.objects_dir, exist_ok=True)
+    os.makedirs(self.parts_dir, exist_ok=True)
+    self._lock = Lock()
+    self._db = sqlite3.connect(os.path.join(self.loot_dir, "index.db"), check_same_thread=False)
+    self._db.execute("PRAGMA journal_mode=WAL")
+    self._db.execute(
+      "CREATE TABLE IF NOT EXISTS urls ("
+      "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, sha256 TEXT NOT NULL, "
+      "size INTEGER NOT NULL, content_type TEXT, fetched TEXT NOT NULL)"
+    )
+    self._db.execute(
+      "CREATE TABLE IF NOT EXISTS names (name TEXT PRIMARY KEY, sha256 TEXT NOT NULL, url TEXT NOT NULL)"
+    )
+    self._db.commit()
+
+  def __repr__(self):
+    return """
+LootIndex(
+  <loot dir = {o.loot_dir}>
+  <urls = {urls}>
+  <names = {names}>
+)
+    """.format(o=self, urls=self._count("urls"), names=self._count("names"))
+
+  def _count(self, table):
+    with self._lock:
+      return self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+  def close(self):
+    with self._lock:
+      self._db.close()
+
+  def object_path(self, sha256):
+    return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+  def part_path(self, url):
+    """
+    part_path: where the download of the URL goes until it's complete, the same on every run,
+    so it can be resumed.
+    """
+    return os.path.join(self.parts_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".part")
+
+  def part_validator(self, url):
+    """
+    part_validator: the ETag or Last-Modified the .part of the URL was downloaded under, for If-Range.
+    :param url: (str) the URL.
+    :return: (str) the validator, or None when there's nothing to go on
+    """
+    try:
+      with open(self.part_path(url) + ".validator") as validator_fh:
+        return validator_fh.read().strip() or None
+    except FileNotFoundError:
+      return None
+
+  def keep_part_validator(self, url, response_headers):
+    """
+    keep_part_validator: remember what the .part of the URL is being downloaded under, a strong ETag,
+    or else the Last-Modified date, so a resume only picks up bytes of the same content.
+    :param url: (str) the URL.
+    :param response_headers: the headers of the response.
+    :return: None
+    """
+    validator_path = self.part_path(url) + ".validator"
+    etag = response_headers.get("ETag")
+    validator = etag if etag is not None and not etag.startswith("W/") else response_headers.get("Last-Modified")
+    if validator is None:
+      if os.path.isfile(validator_path):
+        os.remove(validator_path)
+      return
+    with open(validator_path, "w") as validator_fh:
+      validator_fh.write(validator)
+
+  def drop_part(self, url):
+    """
+    drop_part: forget the .part of the URL, and what it was downloaded under.
+    """
+    for path in (self.part_path(url), self.part_path(url) + ".validator"):
+      if os.path.isfile(path):
+        os.remove(path)
+
+  def lookup(self, url):
+    """
+    lookup: what's known of the URL, as long as its content is still around.
+    :param url: (str) the URL.
+    :return: (dict) the url row, or None
+    """
+    with self._lock:
+      row = self._db.execute(
+        "SELECT url, etag, last_modified, sha256, size, content_type, fetched FROM urls WHERE url = ?", (url,)
+      ).fetchone()
+    if row is None:
+      return None
+    record = dict(zip(("url", "etag", "last_modified", "sha256", "size", "content_type", "fetched"), row))
+    if not os.path.isfile(self.object_path(record["sha256"])):
+      return None
+    return record
+
+  def conditional_headers(self, url):
+    """
+    conditional_headers: the If-None-Match and If-Modified-Since headers for the URL, if it was grabbed before.
+    :param url: (str) the URL.
+    :return: (dict) the headers, empty when there's nothing to go on
+    """
+    record = self.lookup(url)
+    headers = dict()
+    if record is not None and record["etag"] is not None:
+      headers["If-None-Match"] = record["etag"]
+    if record is not None and record["last_modified"] is not None:
+      headers["If-Modified-Since"] = record["last_modified"]
+    return headers
+
+  def store(self, url, part_path, sha256, response_headers):
+    """
+    store: move the complete download into the objects, unless the same content is there already,
+    and remember the URL with it.
+    :param url: (str) the URL.
+    :param part_path: (str) the complete download.
+    :param sha256: (str) the hash of its content.
+    :param response_headers: the headers of the response.
+    :return: (str) the path of the object
+    """
+    object_path = self.object_path(sha256)
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    size = os.path.getsize(part_path)
+    if os.path.isfile(object_path):
+      os.remove(part_path)
+    else:
+      os.replace(part_path, object_path)
+    if os.path.isfile(part_path + ".validator"):
+      os.remove(part_path + ".validator")
+    with self._lock:
+      self._db.execute(
+        "INSERT OR REPLACE INTO urls (url, etag, last_modified, sha256, size, content_type, fetched) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+          url,
+          response_headers.get("ETag"),
+          response_headers.get("Last-Modified"),
+          sha256,
+          size,
+          response_headers.get("Content-Type"),
+          datetime.now(tz=timezone.utc).isoformat()
+        )
+      )
+      self._db.commit()
+    return object_path
+
+  @staticmethod
+  def hash_file(file_path):
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file_fh:
+      for chunk in iter(lambda: file_fh.read(READ_SIZE), b""):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+  def claim_name(self, name, sha256, url):
+    """
+    claim_name: the name to keep the content under. It's name, unless name already holds
+    something else from another URL, then it's stem-<hash8>.ext.
+    :param name: (str) the name asked for.
+    :param sha256: (str) the hash of the content.
+    :param url: (str) the URL it came from.
+    :return: (str) the name to use
+    """
+    with self._lock:
+      row = self._db.execute("SELECT sha256, url FROM names WHERE name = ?", (name,)).fetchone()
+      if row is None and os.path.isfile(name) and self.hash_file(name) != sha256:
+        # a file the index doesn't know about, don't touch it.
+        row = ("", "")
+      if row is not None and row[0] != sha256 and row[1] != url:
+        stem, ext = os.path.splitext(name)
+        name = f"{stem}-{sha256[:8]}{ext}"
+      self._db.execute("INSERT OR REPLACE INTO names (name, sha256, url) VALUES (?, ?, ?)", (name, sha256, url))
+      self._db.commit()
+    return name
+
+  def link(self, sha256, name):
+    """
+    link: hard link the object under name, replacing whatever name was, or copy it
+    where hard links aren't possible.
+    :param sha256: (str) the hash of the content.
+    :param name: (str) the name.
+    :return: None
+    """
+    object_path = self.object_path(sha256)
+    if os.path.isfile(name) and os.path.samefile(object_path, name):
+      return
+    temp_name = f"{name}.{os.getpid()}.{get_ident()}.link"
+    try:
+      os.link(object_path, temp_name)
+    except OSError:
+      shutil.copy2(object_path, temp_name)
+    os.replace(temp_name, name)
@@ -0,0 +1,145 @@
+#! /usr/bin/env python3
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from timeit import default_timer
+
+import grab_pix_from_html
+from LootIndex import LootIndex
+
+
+def make_handler(images, latency, page_kb):
+  """
+  make_handler: a handler serving an index page linking to every image, padded to about page_kb,
+  and the images themselves, with keep-alive, and latency seconds of delay before every response.
+  """
+  filler = "<p>" + "x" * max(0, (page_kb << 10) // max(1, len(images)) - 8) + "</p>\n"
+  class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+      pass
+
+    def do_GET(self):
+      time.sleep(latency)
+      if self.path == "/":
+        links = "".join(f'<a href="http://{self.headers["Host"]}/{name}">{name}</a>{filler}' for name in images)
+        body = f"<html><body>\n{links}</body></html>".encode()
+        content_type = "text/html"
+      elif self.path.lstrip("/") in images:
+        body = images[self.path.lstrip("/")]
+        content_type = "image/jpeg"
+      else:
+        self.send_error(404)
+        return
+      self.send_response(200)
+      self.send_header("Content-Type", content_type)
+      self.send_header("Content-Length", str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+
+  return ImageHandler
+
+
+def run_sequential(target_url):
+  """
+  run_sequential: one download at a time, each over a new connection, the way main used to.
+  """
+  total_bytes = 0
+  with closing(LootIndex()) as index:
+    for link_url in list(grab_pix_from_html._stream_links(target_url=target_url)):
+      total_bytes += grab_pix_from_html.download_target(target_url=link_url, index=index)
+  return total_bytes
+
+
+def time_first_link(target_url):
+  """
+  time_first_link: how long until the first link comes out of the page, and until the page is done.
+  """
+  start = default_timer()
+  links = grab_pix_from_html._stream_links(target_url=target_url)
+  next(links)
+  first = default_timer() - start
+  for _ in links:
+    pass
+  print(f"{'first link':>28}: {first * 1000:8.1f}ms")
+  print(f"{'whole page':>28}: {(default_timer() - start) * 1000:8.1f}ms\n")
+
+
+def time_run(name, run, work_dir, baseline=None):
+  os.makedirs(work_dir)
+  os.chdir(work_dir)
+  start = default_timer()
+  total_bytes = run()
+  seconds = default_timer() - start
+  speedup = "" if baseline is None else f" {baseline / seconds:6.1f}x"
+  print(f"{name:>28}: {seconds:8.2f}s {total_bytes / (1 << 20) / seconds:10.1f}MB/s{speedup}")
+  return seconds
+
+
+def parse_args(system_args):
+  parser = argparse.ArgumentParser(description="time the downloads against a local server.")
+  parser.add_argument("-i",
+                      "--images",
+                      type=int,
+                      default=300,
+                      help="number of images to serve, defaults to 300.")
+  parser.add_argument("-k",
+                      "--kb",
+                      type=int,
+                      default=256,
+                      help="size of every image in KB, defaults to 256.")
+  parser.add_argument("-p",
+                      "--page-kb",
+                      type=int,
+                      default=4096,
+                      help="size of the index page in KB, defaults to 4096.")
+  parser.add_argument("-l",
+                      "--latency-ms",
+                      type=float,
+                      default=5.0,
+                      help="delay before every response, like a remote host, defaults to 5ms.")
+  parser.add_argument("-w",
+                      "--workers",
+                      type=int,
+                      nargs="*",
+                      default=[1, 4, 8, 16],
+                      help="worker counts to try, defaults to 1 4 8 16.")
+  return parser.parse_args(system_args)
+
+
+if __name__ == "__main__":
+  args = parse_args(sys.argv[1:])
+  grab_pix_from_html._logger.setLevel(30)
+  images = {f"{i:04d}.jpg": os.urandom(args.kb << 10) for i in range(args.images)}
+  server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(images, args.latency_ms / 1000, args.page_kb))
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  target_url = f"http://127.0.0.1:{server.server_port}/"
+  print(f"{args.images} images of {args.kb}KB on a {args.page_kb}KB page, {args.latency_ms}ms latency:\n")
+  time_first_link(target_url)
+  bench_dir = tempfile.mkdtemp()
+  here = os.getcwd()
+  try:
+    baseline = time_run("sequential, no keep-alive", lambda: run_sequential(target_url),
+                        os.path.join(bench_dir, "sequential"))
+    for workers in args.workers:
+      time_run(
+        f"{workers} workers, pooled",
+        lambda: grab_pix_from_html.main(
+          target_url=target_url, workers=workers, per_host=workers, show_metrics=False
+        ),
+        os.path.join(bench_dir, f"workers_{workers}"),
+        baseline=baseline
+      )
+  finally:
+    os.chdir(here)
+    shutil.rmtree(bench_dir)
+    server.shutdown()
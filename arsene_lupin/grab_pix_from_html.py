@@ -1,84 +1,527 @@
 #! /usr/bin/env python3
 
 import argparse
+import codecs
+import hashlib
 import os.path
+import re
 import requests
+import time
 
-from bs4 import BeautifulSoup
+from BloomFilter import BloomFilter
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
 from datetime import datetime, timezone
+from DownloadMetrics import DownloadMetrics, TimedHTTPAdapter, pop_connect_seconds
 from fancy_logger import FancyLogger
+from html.parser import HTMLParser
+from LootIndex import LootIndex
 from sys import argv
+from threading import BoundedSemaphore, Lock
+from urllib.parse import urldefrag, urljoin, urlparse
 
 
 _logger = FancyLogger(caller=__name__).get_logger()
 
+WORKERS = 8
+PER_HOST = 4
+MIN_CHUNK_SIZE = 64 << 10
+MAX_CHUNK_SIZE = 1 << 20
+RETRIES = 3
+BACKOFF = 0.5
+PAGE_CHUNK_SIZE = 64 << 10
+EXTENSIONS = (".jpg",)
+MAX_URLS = 1000000
+LOOT_DIR = ".loot"
+# seconds to connect, and to wait for the next bytes, before giving up on a stalled server.
+TIMEOUT = (10, 60)
+CONTENT_RANGE = re.compile(r"^bytes (?P<start>\d+)-\d+/(?P<total>\d+|\*)$")
+# the client errors worth trying again, the rest won't go any better the second time.
+RETRY_STATUSES = (408, 429)
 
-def _connect_url(target_url, streaming=False):
+
+class StatusError(ValueError):
+  """
+  The server answered, with a status that wasn't asked for
+  :param message: (str) what went wrong
+  :param status_code: (int) the status
+  """
+  def __init__(self, message, status_code):
+    super().__init__(message)
+    self.status_code = status_code
+
+
+def _can_retry(error):
+  """
+  Whether a failed download is worth trying again: a timeout, a dropped connection, or a bad status
+  other than a 4xx, except 408 and 429
+  :param error: (Exception) what went wrong
+  :return: (bool)
+  """
+  # a stalled server is what the retries are for.
+  if isinstance(error, requests.Timeout):
+    return True
+  if isinstance(error, StatusError):
+    return not 400 <= error.status_code < 500 or error.status_code in RETRY_STATUSES
+  return True
+
+
+def _get_session(pool_size=WORKERS):
+  """
+  A session whose connections are kept alive and shared by every download, and timed as they're opened
+  :param pool_size: (int) how many connections to keep per host
+  :return: requests session
+  """
+  session = requests.Session()
+  adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+  session.mount("http://", adapter)
+  session.mount("https://", adapter)
+  return session
+
+
+def _chunk_size(total_size):
+  """
+  The chunk size for a download: about a sixteenth of the file, within MIN_CHUNK_SIZE and MAX_CHUNK_SIZE
+  :param total_size: (int) the Content-Length, 0 when unknown
+  :return: (int) the chunk size
+  """
+  if total_size <= 0:
+    return MIN_CHUNK_SIZE * 4
+  return min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, total_size // 16))
+
+
+def _connect_url(target_url, streaming=False, session=None, headers=None, statuses=(200,), timeout=TIMEOUT):
   """
     Load the html data into memory
     :param target_url: (str) the URL of the html document
     :param streaming: (bool) whether we're streaming or not:
                       True for downloading files; False for fetching pages.
+    :param session: (requests.Session) the session to reuse connections from, defaults to a new one
+    :param headers: (dict) extra request headers, such as Range
+    :param statuses: (tuple) the status codes to accept, defaults to 200 only
+    :param timeout: (tuple) the seconds to connect and to wait between bytes, defaults to TIMEOUT
     :return: requests object
+    :raises StatusError: when the status isn't one of statuses, or requests.RequestException when it can't connect
     """
   try:
-    r = requests.get(
+    r = (session or requests).get(
       target_url,
-      stream=streaming
+      stream=streaming,
+      headers=headers,
+      timeout=timeout
     )
-    if r.status_code != 200:
-      _logger.error(f"target URL did not return 200 status!")
-      raise ValueError(f"bailing out for now.")
-    return r
-  except Exception as e:
+  except requests.RequestException:
     _logger.error(f"unable to retrieve data from target url <{target_url}>!")
-    _logger.debug(e)
+    raise
+  if r.status_code not in statuses:
+    r.close()
+    raise StatusError(f"target url <{target_url}> returned {r.status_code} status!", r.status_code)
+  return r
+
+
+class LinkExtractor(HTMLParser):
+  """
+  Picks the href of every <a> tag pointing at a picture, as the page is fed to it chunk by chunk.
+  The links are resolved against the page, and the ones already seen are left out.
+  :param base_url: (str) the URL of the page
+  :param extensions: (tuple) the picture extensions, matched against the end of the link's path
+  :param seen: the links seen so far, anything with add and in, defaults to a new set
+  :param follow: (bool) also keep the links to other pages of the same site, defaults to False
+  """
+  def __init__(self, base_url, extensions=EXTENSIONS, seen=None, follow=False):
+    super().__init__(convert_charrefs=True)
+    self.base_url = base_url
+    self.extensions = tuple(e.lower() for e in extensions)
+    self.seen = set() if seen is None else seen
+    self.follow = follow
+    self.links = list()
+    self.pages = list()
+    self._site = urlparse(base_url).netloc
+
+  def handle_starttag(self, tag, attrs):
+    if tag == "base":
+      # <base href> changes what the relative links are relative to.
+      self.base_url = urljoin(self.base_url, dict(attrs).get("href") or "")
+      return
+    if tag != "a":
+      return
+    href = dict(attrs).get("href")
+    if href is None:
+      return
+    link_url = urldefrag(urljoin(self.base_url, href.strip())).url
+    parsed_url = urlparse(link_url)
+    if parsed_url.scheme not in ("http", "https"):
+      return
+    if parsed_url.path.lower().endswith(self.extensions):
+      if link_url not in self.seen:
+        self.seen.add(link_url)
+        self.links.append(link_url)
+    elif self.follow is True and parsed_url.netloc == self._site and link_url not in self.seen:
+      self.seen.add(link_url)
+      self.pages.append(link_url)
+
+  def pop_links(self):
+    links, self.links = self.links, list()
+    return links
 
+  def pop_pages(self):
+    pages, self.pages = self.pages, list()
+    return pages
 
-def _pull_html(target_url):
+
+class HostDelay:
+  """
+  Spaces the requests to the same host by delay seconds, across threads
+  :param delay: (float) the seconds between two requests to a host, defaults to 0
+  """
+  def __init__(self, delay=0.0):
+    self.delay = delay
+    self._next = dict()
+    self._lock = Lock()
+
+  def wait(self, target_url):
+    if self.delay <= 0:
+      return
+    host = urlparse(target_url).netloc
+    with self._lock:
+      now = time.monotonic()
+      turn = max(now, self._next.get(host, now))
+      self._next[host] = turn + self.delay
+    if turn > now:
+      time.sleep(turn - now)
+
+
+def _feed_extractor(extractor, chunks, encoding):
+  """
+  Feed the chunks of a page to the extractor, decoding them as they come
+  :param extractor: (LinkExtractor) the extractor
+  :param chunks: (iterable) the bytes of the page
+  :param encoding: (str) the encoding of the page, defaults to utf-8 when None
+  :return: generator of the links, as soon as they're found
   """
-  Load the html data into memory
+  decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+  for chunk in chunks:
+    extractor.feed(decoder.decode(chunk))
+    yield from extractor.pop_links()
+  extractor.feed(decoder.decode(b"", final=True))
+  extractor.close()
+  yield from extractor.pop_links()
+
+
+def _stream_links(target_url, session=None, extractor=None, index=None):
+  """
+  Stream the html document through a LinkExtractor, so only a chunk of it is in memory at a time.
+  With an index, the page is kept, and the next time only fetched again if it changed.
   :param target_url: (str) the URL of the html document
-  :return: beautiful soup object
+  :param session: (requests.Session) the session to reuse connections from, defaults to a new one
+  :param extractor: (LinkExtractor) the extractor to use, defaults to one for this page
+  :param index: (LootIndex) the index of what was grabbed so far, defaults to none
+  :return: generator of the links, as soon as they're found
   """
-  r = _connect_url(target_url=target_url)
-  return BeautifulSoup(r.text, "html.parser")
+  extractor = LinkExtractor(base_url=target_url) if extractor is None else extractor
+  headers = None if index is None else index.conditional_headers(target_url)
+  r = _connect_url(target_url=target_url, streaming=True, session=session, headers=headers, statuses=(200, 304))
+  with r:
+    if r.status_code == 304:
+      record = index.lookup(target_url)
+      _logger.debug(f"<{target_url}> hasn't changed.")
+      with open(index.object_path(record["sha256"]), "rb") as page_fh:
+        chunks = iter(lambda: page_fh.read(PAGE_CHUNK_SIZE), b"")
+        encoding = requests.utils.get_encoding_from_headers({"Content-Type": record["content_type"] or "text/html"})
+        yield from _feed_extractor(extractor, chunks, encoding)
+      return
+    content_type = r.headers.get("Content-Type", "text/html")
+    if "html" not in content_type:
+      _logger.debug(f"<{target_url}> is {content_type}, not a page.")
+      return
+    extractor.base_url = r.url
+    if index is None:
+      yield from _feed_extractor(extractor, r.iter_content(chunk_size=PAGE_CHUNK_SIZE), r.encoding)
+      return
+    part_name = index.part_path(target_url)
+    hasher = hashlib.sha256()
+
+    def _keep(chunks, page_fh):
+      for chunk in chunks:
+        page_fh.write(chunk)
+        hasher.update(chunk)
+        yield chunk
+
+    with open(part_name, "wb") as page_fh:
+      yield from _feed_extractor(extractor, _keep(r.iter_content(chunk_size=PAGE_CHUNK_SIZE), page_fh), r.encoding)
+  index.store(target_url, part_name, hasher.hexdigest(), r.headers)
+
+
+def crawl(target_url, depth=0, extensions=EXTENSIONS, max_urls=MAX_URLS, host_delay=None, index=None):
+  """
+  Go through the target page and, up to depth links away, the pages of the same site it links to
+  :param target_url: (str) the URL of the first page
+  :param depth: (int) how many links away from the first page to go, defaults to 0: the first page only
+  :param extensions: (tuple) the picture extensions
+  :param max_urls: (int) how many URLs to remember; the memory for them is set aside up front,
+                   and no more pages than that wait their turn, the ones past it are dropped
+  :param host_delay: (HostDelay) the delay between two pages of the same host, defaults to none
+  :param index: (LootIndex) the index to keep the pages in, defaults to none
+  :return: generator of the picture links, as soon as they're found
+  """
+  host_delay = HostDelay() if host_delay is None else host_delay
+  seen = BloomFilter(capacity=max_urls)
+  seen.add(target_url)
+  frontier = deque([(target_url, 0)])
+  session = _get_session(pool_size=1)
+  pages = 0
+  dropped = 0
+  while len(frontier) > 0:
+    page_url, page_depth = frontier.popleft()
+    extractor = LinkExtractor(base_url=page_url, extensions=extensions, seen=seen, follow=page_depth < depth)
+    host_delay.wait(page_url)
+    try:
+      yield from _stream_links(target_url=page_url, session=session, extractor=extractor, index=index)
+    except (requests.RequestException, ValueError) as e:
+      if pages == 0:
+        raise
+      _logger.warning(f"skipping <{page_url}>.")
+      _logger.debug(e)
+    pages += 1
+    for next_url in extractor.pop_pages():
+      if len(frontier) >= max_urls:
+        dropped += 1
+        continue
+      frontier.append((next_url, page_depth + 1))
+    _logger.debug(f"{pages} pages done, {len(frontier)} to go, {len(seen)} urls seen.")
+  session.close()
+  if dropped > 0:
+    _logger.warning(f"{dropped} pages dropped, more than {max_urls} were waiting at once.")
 
 
 def main(target_url, **kwargs):
   if kwargs.get("verbose", False) is True:
     _logger.setLevel(10)
     _logger.debug("verbose mode activated.")
-  soup = _pull_html(target_url=target_url)
-  ctr = 0
-  for link in soup.find_all("a"):
-    link_url = link.get("href")
-    if ".jpg" not in link_url:
-      continue
-    ctr += 1
-    _logger.info(f"{ctr:02d}. {link_url}")
-    download_target(target_url=link_url)
+  host_delay = HostDelay(delay=kwargs.get("delay", 0.0))
+  index = LootIndex(loot_dir=kwargs.get("loot_dir", LOOT_DIR))
+
+  def _links():
+    links = crawl(
+      target_url=target_url,
+      depth=kwargs.get("depth", 0),
+      extensions=kwargs.get("extensions", EXTENSIONS),
+      max_urls=kwargs.get("max_urls", MAX_URLS),
+      host_delay=host_delay,
+      index=index
+    )
+    for ctr, link_url in enumerate(links, start=1):
+      _logger.info(f"{ctr:02d}. {link_url}")
+      yield link_url
 
+  metrics = DownloadMetrics()
+  with closing(index):
+    total_bytes = download_all(
+      target_urls=_links(),
+      workers=kwargs.get("workers", WORKERS),
+      per_host=kwargs.get("per_host", PER_HOST),
+      retries=kwargs.get("retries", RETRIES),
+      host_delay=host_delay,
+      index=index,
+      metrics=metrics
+    )
+  if kwargs.get("show_metrics", True) is True:
+    metrics.show()
+  if kwargs.get("metrics_file") is not None:
+    metrics.write(kwargs["metrics_file"])
+    _logger.info(f"metrics written to <{kwargs['metrics_file']}>.")
+  return total_bytes
 
-def download_target(target_url):
+
+def download_all(target_urls, workers=WORKERS, per_host=PER_HOST, retries=RETRIES, host_delay=None, index=None,
+                 metrics=None):
+  """
+  download the given urls, workers at a time and at most per_host from the same host,
+  over one session so the connections are reused
+  :param target_urls: (iterable) the URLs to download, each one starts as soon as it comes,
+                      and only a couple of rounds of workers are taken from it ahead of time
+  :param workers: (int) how many downloads to run at the same time
+  :param per_host: (int) how many downloads to run at the same time against the same host
+  :param retries: (int) how many times to try every download again
+  :param host_delay: (HostDelay) the delay between two downloads from the same host, defaults to none
+  :param index: (LootIndex) the index of what was grabbed so far, defaults to the one in .loot
+  :param metrics: (DownloadMetrics) where to record how every download went, defaults to nowhere
+  :return: (int) the number of bytes written
   """
-  download the given url
+  host_delay = HostDelay() if host_delay is None else host_delay
+  if index is None:
+    with closing(LootIndex(loot_dir=LOOT_DIR)) as index:
+      return download_all(target_urls, workers, per_host, retries, host_delay, index, metrics)
+  session = _get_session(pool_size=max(1, min(workers, per_host)))
+  host_limits = dict()
+  lock = Lock()
+
+  def _download(link_url):
+    host = urlparse(link_url).netloc
+    with lock:
+      host_limit = host_limits.setdefault(host, BoundedSemaphore(max(1, per_host)))
+    with host_limit:
+      host_delay.wait(link_url)
+      return download_target(target_url=link_url, session=session, retries=retries, index=index, metrics=metrics)
+
+  total_bytes = 0
+
+  def _collect(done):
+    nonlocal total_bytes
+    for future in done:
+      link_url = in_flight.pop(future)
+      try:
+        total_bytes += future.result()
+      except Exception as e:
+        _logger.error(f"unable to download <{link_url}>!")
+        _logger.debug(e)
+
+  # only keep a couple of rounds in flight, a crawl can turn up millions of links.
+  in_flight = dict()
+  with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+    for link_url in target_urls:
+      in_flight[executor.submit(_download, link_url)] = link_url
+      if len(in_flight) >= max(1, workers) * 2:
+        _collect(wait(in_flight, return_when=FIRST_COMPLETED).done)
+    _collect(wait(in_flight).done)
+  session.close()
+  return total_bytes
+
+
+def download_target(target_url, session=None, retries=RETRIES, index=None, metrics=None):
+  """
+  download the given url, retrying with exponential backoff and picking up where the last try stopped,
+  but not after a 4xx other than 408 and 429
+  :param target_url: (str) the URL to download
+  :param session: (requests.Session) the session to reuse connections from, defaults to a new one
+  :param retries: (int) how many times to try again
+  :param index: (LootIndex) the index of what was grabbed so far, defaults to the one in .loot
+  :param metrics: (DownloadMetrics) where to record how the download went, defaults to nowhere
+  :return: (int) the number of bytes written
+  """
+  if index is None:
+    with closing(LootIndex(loot_dir=LOOT_DIR)) as index:
+      return download_target(target_url=target_url, session=session, retries=retries, index=index, metrics=metrics)
+  pop_connect_seconds()
+  start = time.perf_counter()
+  stats = dict()
+  for attempt in range(retries + 1):
+    try:
+      written = _download_once(target_url=target_url, index=index, session=session, stats=stats)
+      failure = None
+    except (requests.RequestException, ValueError) as e:
+      written = 0
+      failure = e
+      if attempt < retries and _can_retry(e):
+        delay = BACKOFF * (1 << attempt)
+        _logger.warning(f"<{target_url}> failed, retrying in {delay:.1f}s.")
+        _logger.debug(e)
+        time.sleep(delay)
+        continue
+    if metrics is not None:
+      metrics.record(
+        url=target_url,
+        status=stats.get("status"),
+        connect=pop_connect_seconds(),
+        ttfb=stats.get("ttfb", 0.0),
+        seconds=time.perf_counter() - start,
+        transfer=stats.get("transfer", 0.0),
+        total_bytes=written,
+        retries=attempt,
+        error=None if failure is None else str(failure) or type(failure).__name__
+      )
+    if failure is not None:
+      raise failure
+    return written
+
+
+def _download_once(target_url, index, session=None, stats=None):
+  """
+  download the given url into a .part file, resuming it with a Range request when it's there,
+  guarded by an If-Range with the ETag or Last-Modified it was started under, so a changed picture
+  comes back whole instead of being stitched onto the old bytes. Once it's complete, keep it in the
+  index and link it under its name. When the index says it was grabbed before, only ask for it if it
+  changed since.
   :param target_url: (str) the URL to download
-  :return: None
-  """
-  r = _connect_url(target_url=target_url, streaming=True)
-  total_size = int(r.headers.get("Content-Length", 0))
-  chunk_size = 1024
-  file_name = os.path.basename(target_url)
-  if os.path.isfile(file_name) and os.path.getsize(file_name) == total_size:
-    _logger.debug(f"<{file_name}> downloaded.")
+  :param index: (LootIndex) the index of what was grabbed so far
+  :param session: (requests.Session) the session to reuse connections from, defaults to a new one
+  :param stats: (dict) where to put the status, the time to first byte and the transfer time
+  :return: (int) the number of bytes written
+  """
+  stats = dict() if stats is None else stats
+  file_name = os.path.basename(urlparse(target_url).path)
+  part_name = index.part_path(target_url)
+  offset = 0
+  # byte offsets only mean something without content encoding.
+  headers = {"Accept-Encoding": "identity"}
+  validator = index.part_validator(target_url)
+  if os.path.isfile(part_name) and validator is None:
+    # nothing to tell whether the server still has the same content, don't trust the bytes.
+    index.drop_part(target_url)
+  if os.path.isfile(part_name):
+    offset = os.path.getsize(part_name)
+    headers["Range"] = f"bytes={offset}-"
+    headers["If-Range"] = validator
   else:
-    _logger.debug(f"downloading <{file_name}> ({total_size}).")
-    with open(file_name, "wb") as target_fh:
-      r.raw.decode_content = True
-      for chunk in r.iter_content(chunk_size=chunk_size):
+    headers.update(index.conditional_headers(target_url))
+  start = time.perf_counter()
+  r = _connect_url(
+    target_url=target_url,
+    streaming=True,
+    session=session,
+    headers=headers,
+    statuses=(200, 206, 304, 416)
+  )
+  stats["status"] = r.status_code
+  stats["ttfb"] = time.perf_counter() - start
+  stats["transfer"] = 0.0
+  with r:
+    if r.status_code == 304:
+      sha256 = index.lookup(target_url)["sha256"]
+      _logger.debug(f"<{file_name}> hasn't changed.")
+      index.link(sha256, index.claim_name(file_name, sha256, target_url))
+      return 0
+    if r.status_code == 416:
+      # the .part doesn't match what the server has anymore.
+      index.drop_part(target_url)
+      raise ValueError(f"<{file_name}> can't be resumed, starting over.")
+    total_size = int(r.headers.get("Content-Length", 0))
+    if r.status_code == 206:
+      content_range = CONTENT_RANGE.match(r.headers.get("Content-Range", ""))
+      if content_range is None or int(content_range.group("start")) != offset:
+        index.drop_part(target_url)
+        raise ValueError(f"<{target_url}> returned an unexpected range <{r.headers.get('Content-Range')}>.")
+      if content_range.group("total") != "*":
+        total_size = int(content_range.group("total"))
+    else:
+      if offset > 0:
+        _logger.debug(f"<{file_name}> changed or can't be resumed, starting over.")
+      offset = 0
+      index.keep_part_validator(target_url, r.headers)
+    hasher = hashlib.sha256()
+    if offset > 0:
+      _logger.debug(f"resuming <{file_name}> at {offset} of {total_size}.")
+      with open(part_name, "rb") as part_fh:
+        for chunk in iter(lambda: part_fh.read(MAX_CHUNK_SIZE), b""):
+          hasher.update(chunk)
+    else:
+      _logger.debug(f"downloading <{file_name}> ({total_size}).")
+    written = 0
+    start = time.perf_counter()
+    with open(part_name, "ab" if offset > 0 else "wb") as target_fh:
+      for chunk in r.iter_content(chunk_size=_chunk_size(total_size - offset)):
         if chunk:
           target_fh.write(chunk)
+          hasher.update(chunk)
+          written += len(chunk)
+    stats["transfer"] = time.perf_counter() - start
+  if total_size > 0 and offset + written != total_size:
+    raise ValueError(f"<{file_name}> stopped at {offset + written} of {total_size}.")
+  sha256 = hasher.hexdigest()
+  index.store(target_url, part_name, sha256, r.headers)
+  index.link(sha256, index.claim_name(file_name, sha256, target_url))
+  return written
 
 
 def parse_args(sys_args):
@@ -92,6 +535,49 @@ def parse_args(sys_args):
                       type=str,
                       help="target url to grab.",
                       required=True)
+  parser.add_argument("-w",
+                      "--workers",
+                      type=int,
+                      default=WORKERS,
+                      help=f"number of downloads at the same time, defaults to {WORKERS}.")
+  parser.add_argument("-p",
+                      "--per-host",
+                      type=int,
+                      default=PER_HOST,
+                      help=f"number of downloads at the same time from the same host, defaults to {PER_HOST}.")
+  parser.add_argument("-r",
+                      "--retries",
+                      type=int,
+                      default=RETRIES,
+                      help=f"number of times to retry a failed download, defaults to {RETRIES}.")
+  parser.add_argument("-c",
+                      "--crawl-depth",
+                      type=int,
+                      default=0,
+                      help="follow the links to other pages of the same site this many links deep, defaults to 0.")
+  parser.add_argument("-e",
+                      "--extensions",
+                      nargs="+",
+                      default=list(EXTENSIONS),
+                      help=f"extensions of the pictures to grab, defaults to {' '.join(EXTENSIONS)}.")
+  parser.add_argument("-d",
+                      "--delay",
+                      type=float,
+                      default=0.0,
+                      help="seconds to wait between two requests to the same host, defaults to 0.")
+  parser.add_argument("-m",
+                      "--max-urls",
+                      type=int,
+                      default=MAX_URLS,
+                      help=f"number of urls the crawl remembers in a fixed amount of memory, defaults to {MAX_URLS}.")
+  parser.add_argument("-l",
+                      "--loot-dir",
+                      default=LOOT_DIR,
+                      help=f"where to keep the index of what was grabbed, defaults to {LOOT_DIR}.")
+  parser.add_argument("--metrics",
+                      type=str,
+                      default=None,
+                      help="write the numbers of every download to this file, as json lines.")
   return parser.parse_args(sys_args)
 
 
@@ -100,7 +586,16 @@ if __name__ == "__main__":
   args = parse_args(sys_args=argv[1:])
   main(
     target_url=args.target,
-    verbose=args.verbose
+    verbose=args.verbose,
+    workers=args.workers,
+    per_host=args.per_host,
+    retries=args.retries,
+    depth=args.crawl_depth,
+    extensions=tuple(e if e.startswith(".") else f".{e}" for e in args.extensions),
+    delay=args.delay,
+    max_urls=args.max_urls,
+    loot_dir=args.loot_dir,
+    metrics_file=args.metrics
   )
   _end = datetime.now(tz=timezone.utc)
   _delta = _end - _start
@@ -1,6 +1,7 @@
 import argparse
 
-from datetime import date, datetime, timedelta
+from collections.abc import Sequence
+from datetime import date, datetime
 
 
 class BackToTheFuture:
@@ -10,30 +11,89 @@ class BackToTheFuture:
   :param month: (str or int) the destined month, defaults to 11.
   :param number_of_years: (int) the number of years to go back, defaults to 30.
   """
+  DAY = 5
+
   def __init__(self, year=1985, month=11, number_of_years=30):
     self.year = int(year)
     self.month = int(month)
-    self.number_of_years = number_of_years
-    self.right_now = datetime.strptime(f"{year}-{month}-05", "%Y-%m-%d")
-    delta_days = self.number_of_years * 365 + (self.number_of_years // 4)
-    self.years_ago = self.right_now - timedelta(days=delta_days)
+    if not 1 <= self.month <= 12:
+      raise ValueError(f"month must be within 1 and 12, not <{month}>.")
+    self.number_of_years = int(number_of_years)
+    # everything is worked out on month ordinals (year * 12 + month - 1),
+    # so going back n years is exactly n * 12 months, no matter how many leap years.
+    self.right_now_ordinal = self.year * 12 + self.month - 1
+    self.years_ago_ordinal = self.right_now_ordinal - self.number_of_years * 12
+    # dates only go from year 1 to 9999, fail here rather than halfway through a traversal.
+    ordinals = (self.years_ago_ordinal, self.right_now_ordinal)
+    if not 12 <= min(ordinals) <= max(ordinals) < 10000 * 12:
+      raise ValueError(
+        f"{self.number_of_years} years from {self.year}-{self.month:02d} goes outside of years 1 to 9999."
+      )
     self.loop_range = self.number_of_years * 12 + 1
 
-  def by_year(self):
-    for y in range(self.years_ago.year, self.right_now.year + 1):
-      yield date(y, self.right_now.month, self.right_now.day)
+  @staticmethod
+  def _to_date(month_ordinal, day=DAY):
+    return date(month_ordinal // 12, month_ordinal % 12 + 1, day)
+
+  @property
+  def right_now(self):
+    return self._to_date(self.right_now_ordinal)
+
+  @property
+  def years_ago(self):
+    return self._to_date(self.years_ago_ordinal)
+
+  def by_day(self):
+    return Periods(
+      unit="day",
+      ordinals=range(self.years_ago.toordinal(), self.right_now.toordinal() + 1)
+    )
+
+  def by_week(self):
+    return Periods(
+      unit="week",
+      ordinals=range(self.years_ago.toordinal(), self.right_now.toordinal() + 1, 7)
+    )
 
   def by_month(self):
-    for m in range(self.loop_range):
-      new_mth = self.years_ago.month + m
-      new_year = self.years_ago.year
-      new_year += new_mth // 12
-      if new_mth % 12 == 0:
-        new_mth -= ((new_mth // 12) - 1) * 12
-        new_year -= 1
-      else:
-        new_mth -= (new_mth // 12) * 12
-      yield date(new_year, new_mth, self.right_now.day)
+    return Periods(
+      unit="month",
+      ordinals=range(self.years_ago_ordinal, self.right_now_ordinal + 1),
+      day=self.DAY
+    )
+
+  def by_year(self):
+    return Periods(
+      unit="year",
+      ordinals=range(self.years_ago_ordinal // 12, self.right_now_ordinal // 12 + 1),
+      month=self.month,
+      day=self.DAY
+    )
+
+  def to_year_array(self):
+    """
+    to_year_array: the same years as by_year, computed in one go.
+    :return: (numpy.ndarray) datetime64[Y] array, use .astype(numpy.int64) for ordinals.
+    """
+    import numpy as np
+    return np.arange(
+      self.years_ago_ordinal // 12 - 1970,
+      self.right_now_ordinal // 12 - 1970 + 1,
+      dtype=np.int64
+    ).astype("datetime64[Y]")
+
+  def to_month_array(self):
+    """
+    to_month_array: the same months as by_month, computed in one go.
+    :return: (numpy.ndarray) datetime64[M] array, use .astype(numpy.int64) for ordinals.
+    """
+    import numpy as np
+    # datetime64[M] counts months since 1970-01
+    return np.arange(
+      self.years_ago_ordinal - 1970 * 12,
+      self.right_now_ordinal - 1970 * 12 + 1,
+      dtype=np.int64
+    ).astype("datetime64[M]")
 
   @staticmethod
   def parse(sys_args):
@@ -52,6 +112,14 @@ class BackToTheFuture:
                         type=int,
                         default=30,
                         help="the number of years to traverse.")
+    parser.add_argument("-d",
+                        "--daily",
+                        action="store_true",
+                        help="show traversed days.")
+    parser.add_argument("-w",
+                        "--weekly",
+                        action="store_true",
+                        help="show traversed weeks.")
     parser.add_argument("-l",
                         "--monthly",
                         action="store_true",
@@ -60,6 +128,19 @@ class BackToTheFuture:
                         "--annually",
                         action="store_true",
                         help="show traversed years.")
+    parser.add_argument("-b",
+                        "--batch",
+                        default=None,
+                        help="read 'id,year,month,number_of_years' anchors from a csv file, '-' for stdin.")
+    parser.add_argument("-f",
+                        "--format",
+                        choices=("csv", "jsonl"),
+                        default="csv",
+                        help="output format of the batch mode, defaults to csv.")
+    parser.add_argument("-o",
+                        "--output",
+                        default="-",
+                        help="output file of the batch mode, defaults to stdout.")
     return parser.parse_args(sys_args)
 
   def __repr__(self):
@@ -70,6 +151,108 @@ BackToTheFuture(
   <number of years = {o.number_of_years}>
   <right now = {o.right_now}>
   <years ago = {o.years_ago}>
+  <right now ordinal = {o.right_now_ordinal}>
+  <years ago ordinal = {o.years_ago_ordinal}>
   <loop range = {o.loop_range}>
 )
     """.format(o=self)
+
+
+class Periods(Sequence):
+  """
+  Periods: a lazy, range-like sequence of dates, nothing is built until you ask for it.
+  :param unit: (str) one of "day", "week", "month" or "year".
+  :param ordinals: (range) the period ordinals: date.toordinal() for days and weeks,
+                   year * 12 + month - 1 for months, and the year itself for years.
+  :param month: (int) the month of every yearly date, defaults to 1.
+  :param day: (int) the day of every monthly or yearly date, defaults to 1.
+  """
+  UNITS = ("day", "week", "month", "year")
+
+  def __init__(self, unit, ordinals, month=1, day=1):
+    if unit not in self.UNITS:
+      raise ValueError(f"unit must be one of {self.UNITS}, not <{unit}>.")
+    self.unit = unit
+    self.ordinals = ordinals
+    self.month = month
+    self.day = day
+
+  def _to_date(self, ordinal):
+    if self.unit == "month":
+      return date(ordinal // 12, ordinal % 12 + 1, self.day)
+    if self.unit == "year":
+      return date(ordinal, self.month, self.day)
+    return date.fromordinal(ordinal)
+
+  def _to_ordinal(self, value):
+    """
+    _to_ordinal: the reverse of _to_date.
+    :param value: (date) the date in question.
+    :return: the ordinal, or None when the date can never be one of ours.
+    """
+    if not isinstance(value, date):
+      return None
+    if isinstance(value, datetime):
+      value = value.date()
+    if self.unit == "month":
+      if value.day != self.day:
+        return None
+      return value.year * 12 + value.month - 1
+    if self.unit == "year":
+      if (value.month, value.day) != (self.month, self.day):
+        return None
+      return value.year
+    return value.toordinal()
+
+  def __len__(self):
+    return len(self.ordinals)
+
+  def __getitem__(self, item):
+    if isinstance(item, slice):
+      return Periods(unit=self.unit, ordinals=self.ordinals[item], month=self.month, day=self.day)
+    return self._to_date(self.ordinals[item])
+
+  def __iter__(self):
+    return map(self._to_date, self.ordinals)
+
+  def __reversed__(self):
+    return map(self._to_date, reversed(self.ordinals))
+
+  def __contains__(self, value):
+    return self._to_ordinal(value) in self.ordinals
+
+  def index(self, value, *args):
+    ordinal = self._to_ordinal(value)
+    if ordinal not in self.ordinals:
+      raise ValueError(f"{value} is not in {self.unit} periods.")
+    index = self.ordinals.index(ordinal)
+    if args and index not in range(len(self))[slice(*args)]:
+      raise ValueError(f"{value} is not in {self.unit} periods.")
+    return index
+
+  def count(self, value):
+    return int(value in self)
+
+  def window(self, index):
+    """
+    window: the half-open [start, end) range the period covers, handy for range predicates.
+    :param index: (int) the index of the period.
+    :return: (tuple) start and end dates in YYYY-MM-DD format.
+    """
+    ordinal = self.ordinals[index]
+    if self.unit == "month":
+      return tuple(f"{o // 12:04d}-{o % 12 + 1:02d}-01" for o in (ordinal, ordinal + 1))
+    if self.unit == "year":
+      return f"{ordinal:04d}-01-01", f"{ordinal + 1:04d}-01-01"
+    length = 7 if self.unit == "week" else 1
+    return date.fromordinal(ordinal).isoformat(), date.fromordinal(ordinal + length).isoformat()
+
+  def __repr__(self):
+    return """
+Periods(
+  <unit = {o.unit}>
+  <first = {first}>
+  <last = {last}>
+  <length = {length}>
+)
+    """.format(o=self, first=self[0] if self else None, last=self[-1] if self else None, length=len(self))
@@ -0,0 +1,172 @@
+import re
+import sqlite3
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
+
+class PeriodQuery:
+  """
+  PeriodQuery: runs a SQL template once per period of a BackToTheFuture traversal.
+  Each period becomes a half-open range predicate, so an index on the date column can be used:
+    "SELECT SUM(cost) FROM job_costs WHERE {window}"
+  becomes
+    "SELECT SUM(cost) FROM job_costs WHERE (start >= '2018-06-01' AND start < '2018-07-01')"
+  The date column is expected to hold ISO 8601 text, the same as sqlite's own date functions.
+  :param database: (str) the sqlite database file.
+  :param template: (str) the SQL template, with {window} where the predicate should go.
+  :param column: (str) the date column, defaults to start.
+  :param workers: (int) the number of pooled connections and concurrent queries, defaults to 4.
+  :param push_down: (bool) collapse the queries into a single GROUP BY when the template allows,
+                    defaults to True.
+  """
+  WINDOW = "{window}"
+  SIMPLE_SELECT = re.compile(r"^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<rest>.+?);?\s*$",
+                             re.IGNORECASE | re.DOTALL)
+  NOT_SIMPLE = re.compile(r"\b(SELECT|DISTINCT|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|UNION|INTERSECT|EXCEPT)\b",
+                          re.IGNORECASE)
+  # the window has to narrow the whole WHERE clause down, not just one side of an OR.
+  CONJUNCT = re.compile(r"\b(WHERE|AND)\s+\{window\}\s*(\bAND\b|$)", re.IGNORECASE)
+  # an OR would let other rows in, and "BETWEEN x AND {window}" only looks like a conjunct.
+  NOT_CONJUNCT = re.compile(r"\b(OR|BETWEEN)\b", re.IGNORECASE)
+
+  def __init__(self, database, template, column="start", workers=4, push_down=True):
+    if template.count(self.WINDOW) != 1:
+      raise ValueError(f"the template needs exactly one {self.WINDOW} placeholder.")
+    self.database = database
+    self.template = template
+    self.column = column
+    self.workers = workers
+    self.push_down = push_down
+    self.predicate = f"({self.column} >= ? AND {self.column} < ?)"
+    self.sql = self.template.replace(self.WINDOW, self.predicate)
+
+  def __repr__(self):
+    return """
+PeriodQuery(
+  <database = {o.database}>
+  <template = {o.template}>
+  <column = {o.column}>
+  <workers = {o.workers}>
+  <push down = {o.push_down}>
+  <can push down = {can_push_down}>
+)
+    """.format(o=self, can_push_down=self.can_push_down())
+
+  @staticmethod
+  def _top_level(sql):
+    """
+    _top_level: the SQL with whatever's in parentheses or quotes blanked out.
+    :param sql: (str) the SQL.
+    :return: (str) the SQL, the same length, only what's outside of parentheses and quotes left.
+    """
+    kept = list()
+    depth = 0
+    quote = None
+    for c in sql:
+      if quote is not None:
+        quote = None if c == quote else quote
+        kept.append(" ")
+      elif c in "'\"":
+        quote = c
+        kept.append(" ")
+      elif c in "()":
+        depth += 1 if c == "(" else -1
+        kept.append(" ")
+      else:
+        kept.append(c if depth == 0 else " ")
+    return "".join(kept)
+
+  def can_push_down(self):
+    """
+    can_push_down: only a plain "SELECT ... FROM ... WHERE {window}", one row per period, can be grouped,
+    and only when {window} is ANDed with the rest of the WHERE clause, outside of any parentheses.
+    :return: (bool) whether the template can be collapsed into a GROUP BY.
+    """
+    match = self.SIMPLE_SELECT.match(self.template)
+    if match is None:
+      return False
+    rest = self._top_level(match.group("rest"))
+    return self.NOT_SIMPLE.search(match.group("columns")) is None \
+      and self.NOT_SIMPLE.search(match.group("rest")) is None \
+      and self.CONJUNCT.search(rest.strip()) is not None \
+      and self.NOT_CONJUNCT.search(rest) is None
+
+  def run(self, periods):
+    """
+    run: query every period, the results are streamed back in period order.
+    :param periods: (Periods) the traversal, such as BackToTheFuture.by_month().
+    :return: generator of (date, row) tuples.
+    """
+    if len(periods) == 0:
+      return iter(())
+    step = 7 if periods.unit == "week" else 1
+    if self.push_down is True and self.can_push_down() and periods.ordinals.step == step:
+      return self._run_grouped(periods)
+    return self._run_concurrently(periods)
+
+  def _connect(self):
+    return sqlite3.connect(self.database, check_same_thread=False)
+
+  def _query(self, pool, start, end):
+    connection = pool.get()
+    try:
+      return connection.execute(self.sql, (start, end)).fetchone()
+    finally:
+      pool.put(connection)
+
+  def _run_concurrently(self, periods):
+    pool = Queue()
+    for _ in range(self.workers):
+      pool.put(self._connect())
+    try:
+      with ThreadPoolExecutor(max_workers=self.workers) as executor:
+        # only keep a couple of rounds in flight, a daily traversal can be millions of periods.
+        in_flight = deque()
+        for index, period in enumerate(periods):
+          in_flight.append((period, executor.submit(self._query, pool, *periods.window(index))))
+          if len(in_flight) >= self.workers * 2:
+            period, future = in_flight.popleft()
+            yield period, future.result()
+        while in_flight:
+          period, future = in_flight.popleft()
+          yield period, future.result()
+    finally:
+      while not pool.empty():
+        pool.get().close()
+
+  def _bucket(self, periods):
+    """
+    _bucket: the SQL expression that puts a row in its period, and the key for each period.
+    :param periods: (Periods) the traversal.
+    :return: (tuple) the expression, its parameters, and a function to get the key of a period.
+    """
+    if periods.unit == "week":
+      expression = f"CAST((julianday(substr({self.column}, 1, 10)) - julianday(?)) / 7 AS INTEGER)"
+      first_day = periods.window(0)[0]
+      return expression, (first_day,), lambda index, period: index
+    length = {"day": 10, "month": 7, "year": 4}[periods.unit]
+    expression = f"substr({self.column}, 1, {length})"
+    return expression, (), lambda index, period: period.isoformat()[:length]
+
+  def _run_grouped(self, periods):
+    match = self.SIMPLE_SELECT.match(self.template)
+    expression, parameters, get_key = self._bucket(periods)
+    sql = "SELECT {expression} AS period_key, {columns} FROM {rest} GROUP BY period_key".format(
+      expression=expression,
+      columns=match.group("columns"),
+      rest=match.group("rest").replace(self.WINDOW, self.predicate)
+    )
+    start, end = periods.window(0)[0], periods.window(-1)[1]
+    connection = self._connect()
+    try:
+      cursor = connection.execute(sql, parameters + (start, end))
+      results = {row[0]: row[1:] for row in cursor}
+      # periods without any rows get what the template gives over nothing, 0 for COUNT() and NULL for SUM(),
+      # an empty half-open range [start, start) is the quickest way to ask.
+      empty = connection.execute(self.sql, (start, start)).fetchone()
+    finally:
+      connection.close()
+    for index, period in enumerate(periods):
+      yield period, results.get(get_key(index, period), empty)
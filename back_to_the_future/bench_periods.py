@@ -0,0 +1,31 @@
+import sys
+
+from timeit import repeat
+from BackToTheFuture import BackToTheFuture
+
+
+SPANS = (10, 1000, 9000)
+
+
+def best_of(stmt, number):
+  return min(repeat(stmt, number=number, repeat=5)) / number
+
+
+if __name__ == "__main__":
+  # 9999-12 is the latest anchor python dates allow, so 9000 years still fits.
+  year = int(sys.argv[1]) if len(sys.argv) > 1 else 9999
+  month = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+  for number_of_years in SPANS:
+    great_scott = BackToTheFuture(year=year, month=month, number_of_years=number_of_years)
+    number = max(1, 10000 // number_of_years)
+    benchmarks = (
+      ("construction", lambda: BackToTheFuture(year=year, month=month, number_of_years=number_of_years)),
+      ("by_month", lambda: list(great_scott.by_month())),
+      ("to_month_array", great_scott.to_month_array),
+      ("by_year", lambda: list(great_scott.by_year())),
+      ("to_year_array", great_scott.to_year_array),
+      ("by_day[-1]", lambda: great_scott.by_day()[-1]),
+    )
+    print(f"{number_of_years} years back from {year}-{month:02d}:")
+    for name, stmt in benchmarks:
+      print("{name:>16}: {secs:12.9f}s".format(name=name, secs=best_of(stmt, number)))
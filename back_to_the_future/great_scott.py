@@ -1,10 +1,96 @@
+import csv
+import io
+import json
 import sys
 
+from contextlib import ExitStack
 from BackToTheFuture import BackToTheFuture
 
 
+# one megabyte of output is held before every write, instead of flushing every line.
+BUFFER_SIZE = 1 << 20
+
+
+def read_anchors(anchor_fh):
+  """
+  read_anchors: read the anchors from a csv file, a header line is skipped.
+  :param anchor_fh: (file) rows of 'id,year,month,number_of_years', the id is optional.
+  :return: generator of (id, BackToTheFuture) tuples.
+  :raises ValueError: naming the line and the row, when a row isn't an anchor.
+  """
+  reader = csv.reader(anchor_fh)
+  for row in reader:
+    if len(row) == 0 or row[0].startswith("#"):
+      continue
+    line_number = reader.line_num
+    original_row = row
+    if len(row) == 3:
+      row = [str(line_number)] + row
+    try:
+      anchor_id, year, month, number_of_years = (field.strip() for field in row)
+      if line_number == 1 and not year.isdigit():
+        continue
+      great_scott = BackToTheFuture(year=year, month=month, number_of_years=number_of_years)
+    except ValueError as e:
+      raise ValueError(f"line {line_number}: <{','.join(original_row)}> isn't an anchor, {e}") from e
+    yield anchor_id, great_scott
+
+
+def write_batch(anchors, views, output_fh, output_format="csv"):
+  """
+  write_batch: write every period of every anchor in one go.
+  :param anchors: (iterable) (id, BackToTheFuture) tuples.
+  :param views: (list) the views to write, such as ["by_month", "by_year"].
+  :param output_fh: (file) a buffered text file.
+  :param output_format: (str) csv or jsonl, defaults to csv.
+  :return: None
+  """
+  # the id and the view are the same for the whole traversal, so they're quoted once per anchor.
+  if output_format == "csv":
+    quoted = io.StringIO()
+    writer = csv.writer(quoted, lineterminator="")
+    output_fh.write("id,view,date\n")
+  for anchor_id, great_scott in anchors:
+    for view in views:
+      if output_format == "csv":
+        quoted.seek(0)
+        quoted.truncate()
+        writer.writerow([anchor_id, view, ""])
+        prefix, suffix = quoted.getvalue(), "\n"
+      else:
+        prefix = '{{"id": {anchor_id}, "view": "{view}", "date": "'.format(anchor_id=json.dumps(anchor_id), view=view)
+        suffix = '"}\n'
+      output_fh.writelines(f"{prefix}{past_date}{suffix}" for past_date in getattr(great_scott, view)())
+
+
+def run_batch(args):
+  views = [view for view, wanted in (("by_day", args.daily),
+                                     ("by_week", args.weekly),
+                                     ("by_month", args.monthly),
+                                     ("by_year", args.annually)) if wanted is True]
+  if len(views) == 0:
+    views = ["by_month"]
+  # only what's opened here is closed here, stdin and stdout stay open.
+  with ExitStack() as stack:
+    if args.batch == "-":
+      anchor_fh = sys.stdin
+    else:
+      anchor_fh = stack.enter_context(open(args.batch, newline=""))
+    if args.output == "-":
+      output_fh = stack.enter_context(
+        open(sys.stdout.fileno(), "w", buffering=BUFFER_SIZE, newline="", closefd=False)
+      )
+    else:
+      output_fh = stack.enter_context(open(args.output, "w", buffering=BUFFER_SIZE, newline=""))
+    write_batch(anchors=read_anchors(anchor_fh), views=views, output_fh=output_fh, output_format=args.format)
+
+
 if __name__ == "__main__":
   args = BackToTheFuture.parse(sys.argv[1:])
+  if args.batch is not None:
+    run_batch(args)
+    sys.exit(0)
+
   great_scott = BackToTheFuture(
     year=args.year,
     month=args.month,
@@ -12,6 +98,16 @@ if __name__ == "__main__":
   )
   print(great_scott)
 
+  if args.daily is True:
+    print("going from {o.years_ago} to {o.right_now} by day:".format(o=great_scott))
+    for past_date in great_scott.by_day():
+      print(past_date)
+
+  if args.weekly is True:
+    print("going from {o.years_ago} to {o.right_now} by week:".format(o=great_scott))
+    for past_date in great_scott.by_week():
+      print(past_date)
+
   if args.monthly is True:
     print("going from {o.years_ago} to {o.right_now} by month:".format(o=great_scott))
     for past_date in great_scott.by_month():
@@ -0,0 +1,67 @@
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+
+from BackToTheFuture import BackToTheFuture
+from PeriodQuery import PeriodQuery
+
+
+class TestPeriodQuery(unittest.TestCase):
+  """
+  TestPeriodQuery: the GROUP BY push-down has to give the same rows as a query per period.
+  """
+  TEMPLATES = (
+    "SELECT COUNT(*), SUM(cost) FROM job_costs WHERE {window}",
+    "SELECT COUNT(*) FROM job_costs WHERE {window} OR cost > 0.999",
+    "SELECT COUNT(*) FROM job_costs WHERE cost > 0.5 AND {window}",
+    "SELECT COUNT(*), MAX(cost) FROM job_costs WHERE {window} AND (cost < 0.1 OR cost > 0.9)",
+    "SELECT COUNT(*) FROM job_costs WHERE cost BETWEEN 0.2 AND {window}",
+  )
+
+  def setUp(self):
+    database_fh, self.database = tempfile.mkstemp(suffix=".db")
+    os.close(database_fh)
+    rng = random.Random(1985)
+    connection = sqlite3.connect(self.database)
+    connection.execute("CREATE TABLE job_costs (start TEXT, cost REAL)")
+    # a couple of months are left empty, to check what empty periods come back as.
+    connection.executemany("INSERT INTO job_costs VALUES (?, ?)", [
+      (f"{rng.randint(2016, 2018)}-{rng.choice([1, 2, 4, 5, 7, 8, 10, 11]):02d}-{rng.randint(1, 28):02d}", rng.random())
+      for _ in range(5000)
+    ])
+    connection.commit()
+    connection.close()
+
+  def tearDown(self):
+    os.remove(self.database)
+
+  def run_both(self, template, periods):
+    grouped = PeriodQuery(self.database, template, push_down=True)
+    per_period = PeriodQuery(self.database, template, push_down=False)
+    return list(grouped.run(periods)), list(per_period.run(periods))
+
+  def test_push_down_matches_per_period(self):
+    great_scott = BackToTheFuture(year=2018, month=12, number_of_years=3)
+    for template in self.TEMPLATES:
+      for periods in (great_scott.by_month(), great_scott.by_year(), great_scott.by_week(), great_scott.by_day()):
+        with self.subTest(template=template, unit=periods.unit):
+          grouped, per_period = self.run_both(template, periods)
+          self.assertEqual(grouped, per_period)
+
+  def test_can_push_down(self):
+    self.assertTrue(PeriodQuery(self.database, self.TEMPLATES[0]).can_push_down())
+    self.assertTrue(PeriodQuery(self.database, self.TEMPLATES[3]).can_push_down())
+    self.assertFalse(PeriodQuery(self.database, self.TEMPLATES[1]).can_push_down())
+    self.assertFalse(PeriodQuery(self.database, self.TEMPLATES[4]).can_push_down())
+
+  def test_empty_periods(self):
+    great_scott = BackToTheFuture(year=2018, month=3, number_of_years=1)
+    grouped, per_period = self.run_both(self.TEMPLATES[0], great_scott.by_month())
+    self.assertEqual(grouped, per_period)
+    self.assertEqual(dict(grouped)[great_scott.by_month()[-1]], (0, None))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -2,24 +2,76 @@
 
 import argparse
 import os
+import re
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from humanfriendly import format_size
-from subprocess import Popen
+from subprocess import PIPE, Popen
+
+try:
+  from PIL import Image, ImageOps
+except ImportError:
+  Image = None
 
 
 LOGO_FILE = "/path/to/your/logo_file.png"
+LOGO_SIZE = (80, 80)
+LOGO_OFFSET = 12
+FRAME_HEIGHT = 400
+JPEG_QUALITY = 92
+ENGINES = ("pillow", "magick")
+CROP_GEOMETRY = re.compile(r"^(?P<width>\d+)x(?P<height>\d+)(?P<x>[+-]\d+)(?P<y>[+-]\d+)$")
+# linux caps every single argument at 128KB on top of ARG_MAX, and sh -c gets the whole command as one.
+MAX_ARG_STRLEN = 128 * 1024
+
+
+def _command_limit():
+  """
+  _command_limit: how long a command line can be, leaving room for the environment and some slack.
+  """
+  try:
+    arg_max = os.sysconf("SC_ARG_MAX")
+  except (AttributeError, ValueError, OSError):
+    arg_max = 32 * 1024
+  env_size = sum(len(key) + len(value) + 2 for key, value in os.environ.items())
+  return max(4096, min(arg_max - env_size, MAX_ARG_STRLEN) - 4096)
+
+
+COMMAND_LIMIT = _command_limit()
+
+_animator = None
+
+
+def _init_worker(animator):
+  # every worker process keeps its own copy of the animator, and so of the decoded logo.
+  global _animator
+  _animator = animator
+
+
+def _run_batch(stage, frames):
+  getattr(_animator, stage)(frames)
+  return len(frames)
 
 
 class FrameAnimator:
   def __init__(self, output_file, current_working_directory, crop_geometry="640x1080+640+0",
-               remove_odd=True, fake=True):
+               remove_odd=True, fake=True, engine="pillow", logo_file=LOGO_FILE, jobs=1):
     self.output_file = output_file
     self.cwd = current_working_directory
     self.crop_geometry = crop_geometry
     self.remove_odd = remove_odd
     self.fake = fake
+    self.logo_file = logo_file
+    self.jobs = max(1, jobs)
+    if engine not in ENGINES:
+      raise ValueError("engine has to be one of {engines}.".format(engines=", ".join(ENGINES)))
+    if engine == "pillow" and Image is None:
+      print("Pillow isn't installed, falling back to imagemagick.")
+      engine = "magick"
+    self.engine = engine
+    self._logo = None
 
     self.frame_list, self.remove_list = self.create_lists()
     if len(self.frame_list) <= 0:
@@ -32,6 +84,9 @@ Frame Animator(
   <crop geometry = {o.crop_geometry}>,
   <working dir = {o.cwd}>,
   <remove odd = {o.remove_odd}>,
+  <engine = {o.engine}>,
+  <jobs = {o.jobs}>,
+  <logo file = {o.logo_file}>,
   <frames = {o.frame_list}>,
   <removing = {o.remove_list}>,
   <we're faking = {o.fake}>
@@ -49,46 +104,203 @@ Frame Animator(
           frame_list.append(file)
     return sorted(frame_list), sorted(remove_list)
 
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    state["_logo"] = None
+    return state
+
+  def batch_frames(self, frames, command=""):
+    """
+    batch_frames: split the frames into batches, in order, small enough for command plus the batch
+    to stay under COMMAND_LIMIT, and with jobs > 1, small enough to keep every job busy.
+    :param frames: (list) the frames.
+    :param command: (str) the command the frames are appended to, if any.
+    :return: (list) the batches
+    """
+    per_batch = len(frames) if self.jobs == 1 else max(1, -(-len(frames) // (self.jobs * 4)))
+    limit = COMMAND_LIMIT - len(command.encode())
+    batches = list()
+    batch = list()
+    length = 0
+    for frame in frames:
+      cost = len(frame.encode()) + 1
+      if len(batch) > 0 and (length + cost > limit or len(batch) >= per_batch):
+        batches.append(batch)
+        batch = list()
+        length = 0
+      batch.append(frame)
+      length += cost
+    if len(batch) > 0:
+      batches.append(batch)
+    return batches
+
+  def run_batches(self, stage, batches):
+    """
+    run_batches: run the stage on every batch, jobs at a time in a process pool.
+    Every batch runs even when some fail, and the failures are reported in order at the end.
+    :param stage: (str) the method to run on every batch, such as _crop_batch.
+    :param batches: (list) the batches of frames.
+    :return: None
+    """
+    failures = list()
+    if self.jobs == 1 or len(batches) == 1:
+      for batch in batches:
+        try:
+          getattr(self, stage)(batch)
+        except Exception as err:
+          failures.append((batch, err))
+    else:
+      with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker, initargs=(self,)) as executor:
+        futures = [executor.submit(_run_batch, stage, batch) for batch in batches]
+        for batch, future in zip(batches, futures):
+          try:
+            future.result()
+          except Exception as err:
+            failures.append((batch, err))
+    for batch, err in failures:
+      print("batch {first} .. {last} ({frames} frames) failed: {err}".format(
+        first=batch[0],
+        last=batch[-1],
+        frames=len(batch),
+        err=err
+      ))
+    if len(failures) > 0:
+      raise ValueError("{failed} of {total} batches failed.".format(failed=len(failures), total=len(batches)))
+
   def remove_odd_frames(self):
     if self.remove_odd is True and len(self.remove_list) > 0:
-      rm_cmd = "rm " + " ".join(self.remove_list)
-      self.do_cmd(rm_cmd)
+      for batch in self.batch_frames(self.remove_list, command="rm "):
+        self.do_cmd("rm " + " ".join(batch))
       print("odd-numbered frames removed.")
 
   def crop_frames(self):
+    command = "mogrify -crop {o.crop_geometry} ".format(o=self)
+    self.run_batches("_crop_batch", self.batch_frames(self.frame_list, command=command))
+    print("frames cropped.")
+
+  def _crop_batch(self, frames):
     crop_cmd = "mogrify -crop {o.crop_geometry} {frames}".format(
       o=self,
-      frames=" ".join(self.frame_list)
+      frames=" ".join(frames)
     )
     self.do_cmd(crop_cmd)
-    print("frames cropped.")
 
   def pad_and_shrink(self):
-    for frame in self.frame_list:
-      self.pad_logo(frame_file=frame)
-      self.shrink_frame(frame_file=frame)
+    command = "mogrify -resize x{height} ".format(height=FRAME_HEIGHT)
+    self.run_batches("_pad_and_shrink_batch", self.batch_frames(self.frame_list, command=command))
     print("logo padded and shrunk")
 
+  def _pad_and_shrink_batch(self, frames):
+    for frame in frames:
+      self.pad_logo(frame_file=frame)
+    shrink_cmd = "mogrify -resize x{height} {frames}".format(height=FRAME_HEIGHT, frames=" ".join(frames))
+    self.do_cmd(shrink_cmd)
+
   def pad_logo(self, frame_file):
-    pad_cmd = "composite -geometry 80x80+12+12 -gravity southeast {logo} {frame} {frame}".format(
-      logo=LOGO_FILE,
+    pad_cmd = "composite " \
+              "-geometry {size[0]}x{size[1]}+{offset}+{offset} " \
+              "-gravity southeast " \
+              "{logo} {frame} {frame}".format(
+      size=LOGO_SIZE,
+      offset=LOGO_OFFSET,
+      logo=self.logo_file,
       frame=frame_file
     )
     self.do_cmd(pad_cmd)
 
   def shrink_frame(self, frame_file):
-    shrink_cmd = "mogrify -resize x400 {frame}".format(frame=frame_file)
+    shrink_cmd = "mogrify -resize x{height} {frame}".format(height=FRAME_HEIGHT, frame=frame_file)
     self.do_cmd(shrink_cmd)
 
+  def preprocess(self):
+    """
+    preprocess: crop the frames, pad the logo on them, and shrink them, with the engine.
+    :return: None
+    """
+    if self.engine == "pillow":
+      self.process_frames()
+    else:
+      self.crop_frames()
+      self.pad_and_shrink()
+
+  @property
+  def crop_box(self):
+    match = CROP_GEOMETRY.match(self.crop_geometry)
+    if match is None:
+      raise ValueError("crop geometry has to look like WxH+X+Y: {o.crop_geometry}".format(o=self))
+    width, height, x, y = (int(match.group(g)) for g in ("width", "height", "x", "y"))
+    return x, y, x + width, y + height
+
+  @property
+  def logo(self):
+    """
+    logo: the logo, decoded and fitted into LOGO_SIZE once, and kept for every frame.
+    """
+    if self._logo is None:
+      with Image.open(self.logo_file) as logo:
+        self._logo = ImageOps.contain(logo.convert("RGBA"), LOGO_SIZE, method=Image.LANCZOS)
+    return self._logo
+
+  def process_frame(self, frame_file):
+    """
+    process_frame: crop the frame, pad the logo on it and shrink it in memory, the same as
+    crop_frames, pad_logo and shrink_frame do, then write it once.
+    :param frame_file: (str) the frame.
+    :return: None
+    """
+    frame_path = os.path.join(self.cwd, frame_file)
+    with Image.open(frame_path) as frame:
+      frame = self.process_image(frame.convert("RGB"))
+    frame.save(frame_path, quality=JPEG_QUALITY)
+
+  def process_image(self, frame):
+    """
+    process_image: crop the frame, pad the logo on it and shrink it, all in memory.
+    :param frame: (PIL.Image) the frame, in RGB.
+    :return: (PIL.Image) the new frame
+    """
+    # the parts of the box outside the frame are cut off, the way imagemagick does it.
+    left, top, right, bottom = self.crop_box
+    frame = frame.crop((max(0, left), max(0, top), min(frame.width, right), min(frame.height, bottom)))
+    frame.paste(
+      self.logo,
+      (frame.width - self.logo.width - LOGO_OFFSET, frame.height - self.logo.height - LOGO_OFFSET),
+      self.logo
+    )
+    width = max(1, round(frame.width * FRAME_HEIGHT / frame.height))
+    return frame.resize((width, FRAME_HEIGHT), Image.LANCZOS)
+
+  def process_frames(self):
+    if self.fake is True:
+      print("crop {o.crop_geometry}, pad {o.logo_file} and shrink to x{height}: {frames}".format(
+        o=self,
+        height=FRAME_HEIGHT,
+        frames=" ".join(self.frame_list)
+      ))
+      return
+    self.run_batches("_process_batch", self.batch_frames(self.frame_list))
+    print("frames cropped, logo padded and shrunk.")
+
+  def _process_batch(self, frames):
+    for frame in frames:
+      self.process_frame(frame_file=frame)
+
   def animate_frames(self):
-    animate_cmd = "magick {list_of_frames} " \
+    # the frames are read from a list file, a long clip doesn't fit on the command line.
+    list_file = os.path.join(self.cwd, f".{os.path.basename(self.output_file)}.frames.txt")
+    with open(list_file, "w") as list_fh:
+      list_fh.writelines(f"{frame}\n" for frame in self.frame_list)
+    animate_cmd = "magick @{list_file} " \
                   "-delay 1x10 " \
                   "-loop 0 " \
                   "-layers optimize-plus " \
                   "-colors 256 " \
                   "-dither floydsteinberg " \
-                  "{o.output_file}".format(list_of_frames=" ".join(self.frame_list), o=self)
-    self.do_cmd(animate_cmd)
+                  "{o.output_file}".format(list_file=os.path.basename(list_file), o=self)
+    try:
+      self.do_cmd(animate_cmd)
+    finally:
+      os.remove(list_file)
     print("frames animated.")
 
   def output_size(self):
@@ -116,6 +328,135 @@ Frame Animator(
       raise
 
 
+class VideoAnimator(FrameAnimator):
+  """
+  VideoAnimator: animates a part of a video straight from ffmpeg, without any frames on disk.
+  ffmpeg decodes the part into raw RGB frames on a pipe, every frame is cropped, padded and shrunk
+  in memory, and handed to magick on another pipe.
+  :param video_file: (str) the video.
+  :param start: (str) where the part starts, anything ffmpeg takes, such as 00:01:05.5, defaults to the start.
+  :param end: (str) where the part ends, defaults to the end.
+  The rest are the same as FrameAnimator's; remove_odd drops every other frame.
+  """
+  def __init__(self, output_file, video_file, start=None, end=None, current_working_directory=os.getcwd(),
+               crop_geometry="640x1080+640+0", remove_odd=False, fake=False, logo_file=LOGO_FILE):
+    if Image is None:
+      raise ValueError("Pillow is needed to animate a video.")
+    self.video_file = video_file
+    self.start = start
+    self.end = end
+    super().__init__(
+      output_file=output_file,
+      current_working_directory=current_working_directory,
+      crop_geometry=crop_geometry,
+      remove_odd=remove_odd,
+      fake=fake,
+      engine="pillow",
+      logo_file=logo_file
+    )
+
+  def __repr__(self):
+    return """
+Video Animator(
+  <output file = {o.output_file}>,
+  <video file = {o.video_file}>,
+  <start = {o.start}>,
+  <end = {o.end}>,
+  <crop geometry = {o.crop_geometry}>,
+  <working dir = {o.cwd}>,
+  <remove odd = {o.remove_odd}>,
+  <logo file = {o.logo_file}>,
+  <we're faking = {o.fake}>
+)
+    """.format(o=self)
+
+  def create_lists(self):
+    if not os.path.isfile(os.path.join(self.cwd, self.video_file)):
+      raise FileNotFoundError("No video {o.video_file} in {o.cwd}.".format(o=self))
+    # the frames never hit the disk, there's no list of them.
+    return [self.video_file], list()
+
+  def probe_cmd(self):
+    return ["ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height", "-of", "csv=p=0:s=x", self.video_file]
+
+  def decode_cmd(self):
+    # ffprobe reports the size as stored, keep ffmpeg from rotating the frames to a different one.
+    decode_cmd = ["ffmpeg", "-v", "error", "-noautorotate"]
+    if self.start is not None:
+      decode_cmd += ["-ss", self.start]
+    if self.end is not None:
+      decode_cmd += ["-to", self.end]
+    return decode_cmd + ["-i", self.video_file, "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+
+  def animate_cmd(self):
+    return ["magick", "-delay", "1x10", "ppm:-", "-loop", "0", "-layers", "optimize-plus",
+            "-colors", "256", "-dither", "floydsteinberg", self.output_file]
+
+  def frame_size(self):
+    """
+    frame_size: the width and height of the video, from ffprobe.
+    :return: (tuple) width, height
+    """
+    proc = Popen(self.probe_cmd(), cwd=self.cwd, stdout=PIPE)
+    out, _ = proc.communicate()
+    if proc.returncode != 0:
+      raise ValueError("Command did not return ZERO status : {status}".format(status=proc.returncode))
+    width, height = out.decode().strip().split("x")[:2]
+    return int(width), int(height)
+
+  def read_frames(self):
+    """
+    read_frames: the frames of the part of the video, one at a time, straight from ffmpeg.
+    :return: generator of PIL.Image
+    """
+    width, height = self.frame_size()
+    frame_bytes = width * height * 3
+    with Popen(self.decode_cmd(), cwd=self.cwd, stdout=PIPE, bufsize=frame_bytes) as ffmpeg:
+      try:
+        while True:
+          buffer = ffmpeg.stdout.read(frame_bytes)
+          if len(buffer) < frame_bytes:
+            break
+          yield Image.frombytes("RGB", (width, height), buffer)
+      finally:
+        ffmpeg.stdout.close()
+        ffmpeg.wait()
+    if ffmpeg.returncode != 0:
+      raise ValueError("Command did not return ZERO status : {status}".format(status=ffmpeg.returncode))
+
+  def preprocess(self):
+    # the frames are processed on their way to magick.
+    pass
+
+  def animate_frames(self):
+    if self.fake is True:
+      print(" ".join(self.decode_cmd()) + " | (crop, pad and shrink) | " + " ".join(self.animate_cmd()))
+      return
+    magick = Popen(self.animate_cmd(), cwd=self.cwd, stdin=PIPE)
+    frames = 0
+    try:
+      for index, frame in enumerate(self.read_frames()):
+        if self.remove_odd is True and index % 2 == 1:
+          continue
+        self.process_image(frame).save(magick.stdin, format="PPM")
+        frames += 1
+    except BaseException:
+      magick.kill()
+      raise
+    finally:
+      try:
+        magick.stdin.close()
+      except BrokenPipeError:
+        pass
+      magick.wait()
+    if frames == 0:
+      raise ValueError("No frames in {o.video_file} between {o.start} and {o.end}.".format(o=self))
+    if magick.returncode != 0:
+      raise ValueError("Command did not return ZERO status : {status}".format(status=magick.returncode))
+    print("{frames} frames animated.".format(frames=frames))
+
+
 def parse_args(system_args):
   parser = argparse.ArgumentParser(description="animate frames hehe.")
   parser.add_argument("-c",
@@ -123,6 +464,12 @@ def parse_args(system_args):
                       type=str,
                       default="640x1080+640+0",
                       help="the crop geometry of the frames used by imagemagick, such as '640x1080+640+0'.")
+  parser.add_argument("-e",
+                      "--engine",
+                      choices=ENGINES,
+                      default=None,
+                      help="what to crop, pad and shrink the frames with, defaults to pillow, "
+                           "or imagemagick when pillow isn't installed.")
   parser.add_argument("-f",
                       "--fake",
                       action="store_true",
@@ -132,6 +479,28 @@ def parse_args(system_args):
                       type=str,
                       default=os.getcwd(),
                       help="location of the frames. defaults to current directory")
+  parser.add_argument("-i",
+                      "--video",
+                      type=str,
+                      default=None,
+                      help="animate this video, under the location, instead of the frames.")
+  parser.add_argument("--start",
+                      type=str,
+                      default=None,
+                      help="where the part of the video starts, such as 00:01:05.5, defaults to the start.")
+  parser.add_argument("--end",
+                      type=str,
+                      default=None,
+                      help="where the part of the video ends, such as 00:01:15.5, defaults to the end.")
+  parser.add_argument("-j",
+                      "--jobs",
+                      type=int,
+                      default=1,
+                      help="number of processes to crop, pad and shrink the frames with, defaults to 1.")
+  parser.add_argument("--logo",
+                      type=str,
+                      default=LOGO_FILE,
+                      help="the logo to pad on the frames, defaults to {logo}.".format(logo=LOGO_FILE))
   parser.add_argument("-o",
                       "--output",
                       type=str,
@@ -146,23 +515,42 @@ def parse_args(system_args):
                       action="store_true",
                       default=False,
                       help="don't do preprocess, just animate the cropped frames.")
-  return parser.parse_args(system_args)
+  args = parser.parse_args(system_args)
+  if args.video is not None and (args.engine is not None or args.jobs != 1):
+    parser.error("--video frames are done one by one with pillow, on their way to magick, "
+                 "--engine and --jobs don't apply.")
+  return args
 
 
 if __name__ == "__main__":
   start = datetime.now()
   args = parse_args(system_args=sys.argv[1:])
-  animator = FrameAnimator(
-    output_file=args.output,
-    crop_geometry=args.crop,
-    current_working_directory=args.location,
-    remove_odd=args.remove,
-    fake=args.fake
-  )
+  if args.video is not None:
+    animator = VideoAnimator(
+      output_file=args.output,
+      video_file=args.video,
+      start=args.start,
+      end=args.end,
+      current_working_directory=args.location,
+      crop_geometry=args.crop,
+      remove_odd=args.remove,
+      fake=args.fake,
+      logo_file=args.logo
+    )
+  else:
+    animator = FrameAnimator(
+      output_file=args.output,
+      crop_geometry=args.crop,
+      current_working_directory=args.location,
+      remove_odd=args.remove,
+      fake=args.fake,
+      engine=args.engine or "pillow",
+      logo_file=args.logo,
+      jobs=args.jobs
+    )
   if not args.reanimate:
     animator.remove_odd_frames()
-    animator.crop_frames()
-    animator.pad_and_shrink()
+    animator.preprocess()
   animator.animate_frames()
   print(animator.output_size())
 
@@ -0,0 +1,103 @@
+#! /usr/bin/env python3
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from PIL import Image, ImageDraw
+from timeit import default_timer
+
+from animate_frames import ENGINES, FrameAnimator
+
+
+def make_frames(frames_dir, frames, size):
+  """
+  make_frames: frames_0000.jpg and on, with something on them so the jpegs aren't trivially small.
+  """
+  os.makedirs(frames_dir)
+  for i in range(frames):
+    frame = Image.new("RGB", size, ((i * 7) % 256, 64, 160))
+    draw = ImageDraw.Draw(frame)
+    for j in range(0, size[0], 40):
+      draw.line((j, 0, (j + i * 5) % size[0], size[1]), fill=(255, (j * 3) % 256, 0), width=3)
+    frame.save(os.path.join(frames_dir, f"frames_{i:04d}.jpg"), quality=92)
+
+
+def make_logo(logo_file):
+  logo = Image.new("RGBA", (200, 200), (0, 0, 0, 0))
+  ImageDraw.Draw(logo).ellipse((10, 10, 190, 190), fill=(255, 255, 255, 200))
+  logo.save(logo_file)
+
+
+def time_engine(engine, source_dir, work_dir, logo_file, crop_geometry, jobs):
+  shutil.copytree(source_dir, work_dir)
+  animator = FrameAnimator(
+    output_file="out.gif",
+    current_working_directory=work_dir,
+    crop_geometry=crop_geometry,
+    remove_odd=False,
+    fake=False,
+    engine=engine,
+    logo_file=logo_file,
+    jobs=jobs
+  )
+  start = default_timer()
+  animator.preprocess()
+  return default_timer() - start
+
+
+def parse_args(system_args):
+  parser = argparse.ArgumentParser(description="time the engines cropping, padding and shrinking frames.")
+  parser.add_argument("-f",
+                      "--frames",
+                      type=int,
+                      default=300,
+                      help="number of frames, defaults to 300.")
+  parser.add_argument("-s",
+                      "--size",
+                      type=str,
+                      default="1920x1080",
+                      help="size of the frames, defaults to 1920x1080.")
+  parser.add_argument("-c",
+                      "--crop",
+                      type=str,
+                      default="640x1080+640+0",
+                      help="the crop geometry, defaults to 640x1080+640+0.")
+  parser.add_argument("-j",
+                      "--jobs",
+                      type=int,
+                      nargs="*",
+                      default=sorted({1, os.cpu_count() or 1}),
+                      help="numbers of jobs to try, defaults to 1 and the number of cpus.")
+  return parser.parse_args(system_args)
+
+
+if __name__ == "__main__":
+  args = parse_args(sys.argv[1:])
+  size = tuple(int(n) for n in args.size.split("x"))
+  bench_dir = tempfile.mkdtemp()
+  try:
+    source_dir = os.path.join(bench_dir, "source")
+    logo_file = os.path.join(bench_dir, "logo.png")
+    make_frames(source_dir, args.frames, size)
+    make_logo(logo_file)
+    print(f"{args.frames} frames of {args.size}, cropped to {args.crop}:\n")
+    results = dict()
+    for engine in ENGINES:
+      if engine == "magick" and not all(shutil.which(c) for c in ("mogrify", "composite")):
+        print(f"{engine:>8}: skipped, imagemagick isn't installed.")
+        continue
+      for jobs in args.jobs:
+        seconds = time_engine(
+          engine, source_dir, os.path.join(bench_dir, f"{engine}_{jobs}"), logo_file, args.crop, jobs
+        )
+        results[(engine, jobs)] = seconds
+        speedup = results.get((engine, 1), seconds) / seconds
+        print(f"{engine:>8} x{jobs:<3}: {seconds:8.2f}s {seconds / args.frames * 1000:8.1f}ms per frame "
+              f"{speedup:6.1f}x")
+    if ("magick", 1) in results and ("pillow", 1) in results:
+      print(f"\npillow is {results[('magick', 1)] / results[('pillow', 1)]:.1f}x as fast on one job.")
+  finally:
+    shutil.rmtree(bench_dir)
@@ -1,5 +1,6 @@
-from datetime import date, datetime
-from dateutil.relativedelta import relativedelta
+from datetime import datetime
+from itertools import count
+from Quarter import Quarter
 
 
 class QRelease2:
@@ -16,18 +17,10 @@ class QRelease2:
 
     self.current = Quarter(self._get_start_of_quarter(self.query_datetime.year, self.query_datetime.month))
 
-    self.next_releases = list()
-    self.prev_releases = list()
-    for n in range(1, num_rels+1):
-      prev_rel = Quarter(
-        self._get_start_of_quarter(self.query_datetime.year, self.query_datetime.month, multiplier=-n)
-      )
-      self.prev_releases.append(prev_rel)
-      next_rel = Quarter(
-        self._get_start_of_quarter(self.query_datetime.year, self.query_datetime.month, multiplier=n)
-      )
-      self.next_releases.append(next_rel)
-    self.ghosts_of_christmas = sorted([q.release for q in self.prev_releases + [self.current] + self.next_releases])
+    self.next_releases = [self.release_at(n) for n in range(1, num_rels+1)]
+    self.prev_releases = [self.release_at(-n) for n in range(1, num_rels+1)]
+    # the quarters are already in order, going back then going forward.
+    self.ghosts_of_christmas = [q.release for q in self.prev_releases[::-1] + [self.current] + self.next_releases]
 
   def _get_start_of_quarter(self, year, month, multiplier=0):
     """
@@ -38,14 +31,79 @@ class QRelease2:
     :param multiplier: (int) how many release periods to add / subtract
     :return: date object of the computed release period
     """
-    int_mth = int(month)
-    int_year = int(year)
-    # in order to get to the start of the release period, we use modulus
-    reducer = int_mth % self.rel_period
-    # work out how many months to add / remove
-    padded_months = multiplier * self.rel_period
-    # using relativedelta, we can work out any number of releases we need
-    return date(int_year, int_mth, 1) - relativedelta(months=reducer) + relativedelta(months=padded_months)
+    # on month ordinals (year * 12 + month - 1), we can work out any number of releases we need
+    start = Quarter.start_ordinal(int(year) * 12 + int(month) - 1, self.rel_period)
+    return Quarter.from_ordinal(start + multiplier * self.rel_period).start_date
+
+  def release_at(self, offset):
+    """
+    release_at: the release that is a number of releases away from the current one.
+    :param offset: (int) how many releases to go forward, negative to go back.
+    :return: Quarter of the release
+    """
+    return Quarter.from_ordinal(self.current.ordinal + offset * self.rel_period)
+
+  def _offset_of(self, start):
+    """
+    _offset_of: work out the offset of where to start iterating.
+    :param start: (int or Quarter) an offset from the current release, or a release.
+    :return: (int) the offset from the current release
+    """
+    if not isinstance(start, Quarter):
+      return int(start)
+    offset, remainder = divmod(start.ordinal - self.current.ordinal, self.rel_period)
+    if remainder != 0:
+      raise ValueError(f"{start.release} is not a release when releasing every {self.rel_period} months.")
+    return offset
+
+  def iter_forward(self, start=0):
+    """
+    iter_forward: walk the releases forward, one at a time, for as long as you like.
+    :param start: (int or Quarter) an offset from the current release, or a release, defaults to 0.
+    :return: generator of Quarter
+    """
+    for offset in count(self._offset_of(start)):
+      yield self.release_at(offset)
+
+  def iter_backward(self, start=0):
+    """
+    iter_backward: walk the releases backward, one at a time, for as long as you like.
+    :param start: (int or Quarter) an offset from the current release, or a release, defaults to 0.
+    :return: generator of Quarter
+    """
+    for offset in count(self._offset_of(start), -1):
+      yield self.release_at(offset)
+
+  @staticmethod
+  def classify(dates, every=3, field="release"):
+    """
+    classify: tag lots of dates with their release in one go, instead of one QRelease2 per date.
+    :param dates: (iterable or numpy.ndarray) YYYY-MM-DD strings, date / datetime objects or datetime64 values.
+    :param every: (int) the release period, 12 must be divisible by it, defaults to 3.
+    :param field: (str) release, abbreviation or folder_str, defaults to release.
+    :return: (numpy.ndarray) the requested release string of every date.
+    """
+    # numpy is only needed here, so it isn't imported until then.
+    import numpy as np
+    if 12 % every != 0:
+      raise ValueError(f"12 must be divisible by the release period, not <{every}>.")
+    if field not in ("release", "abbreviation", "folder_str"):
+      raise ValueError(f"unknown release field <{field}>.")
+    if not isinstance(dates, np.ndarray) or dates.dtype.kind != "M":
+      dates = np.array(list(dates), dtype="datetime64[s]")
+    # months since 1970-01, the same as datetime64[M]
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    if months.size == 0:
+      return np.array([], dtype=str)
+    starts = Quarter.start_ordinal(months, every)
+    # every start lands on the same month of the release cycle, so the release calendar
+    # between the earliest and the latest start is a small table we can index straight into.
+    first_start = starts.min()
+    calendar = np.array([
+      getattr(Quarter.from_ordinal(1970 * 12 + o), field)
+      for o in range(first_start, starts.max() + 1, every)
+    ])
+    return calendar[(starts - first_start) // every]
 
   def __repr__(self):
     return """
@@ -57,26 +115,3 @@ QRelease(
 )
     """.format(o=self)
 
-
-class Quarter:
-  def __init__(self, start_of_quarter):
-    """
-    Qurater: a class to store quarter data.
-    :param start_of_quarter: (date) the date which the quarter starts.
-    """
-    self.year = start_of_quarter.year
-    self.month = "{m:02d}".format(m=start_of_quarter.month)
-    self.release = "{o.year}.{o.month}".format(o=self)
-    self.abbreviation = "{y}{m}".format(y=str(self.year)[2:], m=self.month)
-    self.folder_str = "{o.year}_{o.month}".format(o=self)
-
-  def __repr__(self):
-    return """
-  Quarter(
-    <year = {o.year}>
-    <month = {o.month}>
-    <release = {o.release}>
-    <abbreviation = {o.abbreviation}>
-    <folder = {o.folder_str}>
-  )
-    """.format(o=self)
@@ -0,0 +1,103 @@
+from datetime import date
+from functools import total_ordering
+
+
+@total_ordering
+class Quarter:
+  """
+  Quarter: a class to store quarter data.
+  Every release exists only once: Quarter(date(2019, 6, 1)) is Quarter(date(2019, 6, 1)),
+  so they're cheap to hash and compare, and can be used as dict keys in big aggregations.
+  The strings are only formatted the first time they're asked for.
+  :param start_of_quarter: (date) the date which the quarter starts.
+  """
+  __slots__ = ("ordinal", "_release", "_abbreviation", "_folder_str")
+  _releases = dict()
+
+  def __new__(cls, start_of_quarter):
+    return cls.from_ordinal(start_of_quarter.year * 12 + start_of_quarter.month - 1)
+
+  @classmethod
+  def from_ordinal(cls, ordinal):
+    """
+    from_ordinal: get the quarter of the given month ordinal.
+    :param ordinal: (int) year * 12 + month - 1 of the start of the quarter.
+    :return: the one and only Quarter of that month.
+    """
+    quarter = cls._releases.get(ordinal)
+    if quarter is None:
+      quarter = object.__new__(cls)
+      quarter.ordinal = int(ordinal)
+      quarter._release = None
+      quarter._abbreviation = None
+      quarter._folder_str = None
+      quarter = cls._releases.setdefault(quarter.ordinal, quarter)
+    return quarter
+
+  @staticmethod
+  def start_ordinal(month_ordinal, every):
+    """
+    start_ordinal: the start of the release period the month is in, going back (month % every) months.
+    Only plain arithmetic, so it works on numpy arrays of ordinals too, and on months since 1970-01.
+    :param month_ordinal: (int) year * 12 + month - 1, or anything counting months from a January.
+    :param every: (int) the release period, 12 must be divisible by it.
+    :return: (int) the month ordinal of the start of the release period.
+    """
+    return month_ordinal - (month_ordinal % 12 + 1) % every
+
+  def __reduce__(self):
+    return Quarter.from_ordinal, (self.ordinal,)
+
+  @property
+  def year(self):
+    return self.ordinal // 12
+
+  @property
+  def month(self):
+    return "{m:02d}".format(m=self.ordinal % 12 + 1)
+
+  @property
+  def start_date(self):
+    return date(self.year, self.ordinal % 12 + 1, 1)
+
+  @property
+  def release(self):
+    if self._release is None:
+      self._release = "{o.year}.{o.month}".format(o=self)
+    return self._release
+
+  @property
+  def abbreviation(self):
+    if self._abbreviation is None:
+      self._abbreviation = "{y}{m}".format(y=str(self.year)[2:], m=self.month)
+    return self._abbreviation
+
+  @property
+  def folder_str(self):
+    if self._folder_str is None:
+      self._folder_str = "{o.year}_{o.month}".format(o=self)
+    return self._folder_str
+
+  def __eq__(self, other):
+    if not isinstance(other, Quarter):
+      return NotImplemented
+    return self.ordinal == other.ordinal
+
+  def __lt__(self, other):
+    if not isinstance(other, Quarter):
+      return NotImplemented
+    return self.ordinal < other.ordinal
+
+  def __hash__(self):
+    return hash(self.ordinal)
+
+  def __repr__(self):
+    return """
+  Quarter(
+    <year = {o.year}>
+    <month = {o.month}>
+    <release = {o.release}>
+    <abbreviation = {o.abbreviation}>
+    <folder = {o.folder_str}>
+  )
+    """.format(o=self)
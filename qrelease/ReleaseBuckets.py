@@ -0,0 +1,218 @@
+#! /usr/bin/env python3
+
+import argparse
+import csv
+import mmap
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from Quarter import Quarter
+
+
+def _aggregate_chunk(csv_file, start, end, date_index, value_indexes, every):
+  """
+  _aggregate_chunk: sum up the rows between two byte offsets of the csv file.
+  Only one chunk is ever in memory, and it is module level so a process pool can pickle it.
+  :param csv_file: (str) path of the csv file.
+  :param start: (int) the byte offset of the first row.
+  :param end: (int) the byte offset just after the last row.
+  :param date_index: (int) the index of the date column.
+  :param value_indexes: (list) the indexes of the value columns.
+  :param every: (int) the release period.
+  :return: (dict) month ordinal of the release -> [count, sums, mins, maxes]
+  """
+  with open(csv_file, "rb") as csv_fh, mmap.mmap(csv_fh.fileno(), 0, access=mmap.ACCESS_READ) as csv_map:
+    lines = csv_map[start:end].decode("utf-8").splitlines()
+  buckets = dict()
+  # thousands of rows share the same YYYY-MM, so it is only worked out once.
+  releases = dict()
+  for row in csv.reader(lines):
+    if len(row) == 0:
+      continue
+    year_month = row[date_index][:7]
+    release = releases.get(year_month)
+    if release is None:
+      month_ordinal = int(year_month[:4]) * 12 + int(year_month[5:7]) - 1
+      release = releases[year_month] = Quarter.start_ordinal(month_ordinal, every)
+    bucket = buckets.get(release)
+    if bucket is None:
+      columns = len(value_indexes)
+      bucket = buckets[release] = [0, [0.0] * columns, [None] * columns, [None] * columns]
+    bucket[0] += 1
+    sums, mins, maxes = bucket[1], bucket[2], bucket[3]
+    for n, value_index in enumerate(value_indexes):
+      field = row[value_index]
+      if field == "":
+        continue
+      value = float(field)
+      sums[n] += value
+      if mins[n] is None or value < mins[n]:
+        mins[n] = value
+      if maxes[n] is None or value > maxes[n]:
+        maxes[n] = value
+  return buckets
+
+
+class ReleaseBuckets:
+  """
+  ReleaseBuckets: sums up the value columns of a csv file per release, without loading the file.
+  The file is memory mapped and cut into chunks on line breaks, so quoted values can't contain newlines.
+  :param csv_file: (str) path of the csv file, with a header line.
+  :param date_column: (str) name of the date column, in YYYY-MM-DD format.
+  :param value_columns: (list) names of the columns to sum up.
+  :param every: (int) the release period, 12 must be divisible by it, defaults to 3.
+  :param workers: (int) number of processes to split the chunks across, defaults to 1.
+  :param chunk_size: (int) the number of bytes per chunk, defaults to 32MB.
+  """
+  def __init__(self, csv_file, date_column, value_columns, every=3, workers=1, chunk_size=32 << 20):
+    if 12 % every != 0:
+      raise ValueError(f"12 must be divisible by the release period, not <{every}>.")
+    self.csv_file = csv_file
+    self.date_column = date_column
+    self.value_columns = list(value_columns)
+    self.rel_period = every
+    self.workers = workers
+    self.chunk_size = chunk_size
+    with open(self.csv_file, "rb") as csv_fh:
+      header_line = csv_fh.readline()
+      self._data_start = csv_fh.tell()
+      self._file_size = csv_fh.seek(0, 2)
+    self.header = next(csv.reader([header_line.decode("utf-8-sig")]), [])
+    missing = [c for c in [self.date_column] + self.value_columns if c not in self.header]
+    if len(missing) > 0:
+      raise ValueError(f"columns {missing} are not in the header of <{self.csv_file}>.")
+    self.date_index = self.header.index(self.date_column)
+    self.value_indexes = [self.header.index(c) for c in self.value_columns]
+    self.buckets = dict()
+
+  def __repr__(self):
+    return """
+ReleaseBuckets(
+  <csv file = {o.csv_file}>
+  <date column = {o.date_column}>
+  <value columns = {o.value_columns}>
+  <every = {o.rel_period}>
+  <workers = {o.workers}>
+  <chunk size = {o.chunk_size}>
+  <releases = {releases}>
+)
+    """.format(o=self, releases=len(self.buckets))
+
+  def _chunks(self):
+    """
+    _chunks: cut the rows into chunks of about chunk_size bytes, on line breaks.
+    :return: generator of (start, end) byte offsets
+    """
+    if self._data_start >= self._file_size:
+      return
+    with open(self.csv_file, "rb") as csv_fh, mmap.mmap(csv_fh.fileno(), 0, access=mmap.ACCESS_READ) as csv_map:
+      start = self._data_start
+      while start < self._file_size:
+        line_break = csv_map.find(b"\n", min(start + self.chunk_size, self._file_size) - 1)
+        end = self._file_size if line_break < 0 else line_break + 1
+        yield start, end
+        start = end
+
+  def _merge(self, chunk_buckets):
+    for release, (count, sums, mins, maxes) in chunk_buckets.items():
+      bucket = self.buckets.get(release)
+      if bucket is None:
+        self.buckets[release] = [count, sums, mins, maxes]
+        continue
+      bucket[0] += count
+      for n in range(len(self.value_indexes)):
+        bucket[1][n] += sums[n]
+        if mins[n] is not None and (bucket[2][n] is None or mins[n] < bucket[2][n]):
+          bucket[2][n] = mins[n]
+        if maxes[n] is not None and (bucket[3][n] is None or maxes[n] > bucket[3][n]):
+          bucket[3][n] = maxes[n]
+
+  def aggregate(self):
+    """
+    aggregate: go through the file once, in chunks, and keep running totals per release.
+    :return: (dict) Quarter -> {"count": int, column: {"sum": float, "min": float, "max": float}}
+    """
+    self.buckets = dict()
+    chunks = list(self._chunks())
+    chunk_args = (
+      [self.csv_file] * len(chunks),
+      [start for start, _ in chunks],
+      [end for _, end in chunks],
+      [self.date_index] * len(chunks),
+      [self.value_indexes] * len(chunks),
+      [self.rel_period] * len(chunks),
+    )
+    if self.workers > 1 and len(chunks) > 1:
+      with ProcessPoolExecutor(max_workers=self.workers) as executor:
+        for chunk_buckets in executor.map(_aggregate_chunk, *chunk_args):
+          self._merge(chunk_buckets)
+    else:
+      for chunk_buckets in map(_aggregate_chunk, *chunk_args):
+        self._merge(chunk_buckets)
+    return self.results()
+
+  def results(self):
+    results = dict()
+    for release in sorted(self.buckets):
+      count, sums, mins, maxes = self.buckets[release]
+      result = {"count": count}
+      for n, column in enumerate(self.value_columns):
+        result[column] = {"sum": sums[n], "min": mins[n], "max": maxes[n]}
+      results[Quarter.from_ordinal(release)] = result
+    return results
+
+  @staticmethod
+  def parse_args(system_args):
+    parser = argparse.ArgumentParser(description="sum up a csv file per release.")
+    parser.add_argument("-c",
+                        "--chunk-size",
+                        type=int,
+                        default=32,
+                        help="size of the chunks in MB, defaults to 32.")
+    parser.add_argument("-d",
+                        "--date-column",
+                        required=True,
+                        help="name of the date column.")
+    parser.add_argument("-e",
+                        "--every",
+                        type=int,
+                        default=3,
+                        help="the release period, defaults to 3.")
+    parser.add_argument("-f",
+                        "--file",
+                        required=True,
+                        help="the csv file.")
+    parser.add_argument("-v",
+                        "--value-columns",
+                        nargs="+",
+                        required=True,
+                        help="names of the columns to sum up.")
+    parser.add_argument("-w",
+                        "--workers",
+                        type=int,
+                        default=1,
+                        help="number of processes, defaults to 1.")
+    return parser.parse_args(system_args)
+
+
+if __name__ == "__main__":
+  start = datetime.now()
+  args = ReleaseBuckets.parse_args(sys.argv[1:])
+  release_buckets = ReleaseBuckets(
+    csv_file=args.file,
+    date_column=args.date_column,
+    value_columns=args.value_columns,
+    every=args.every,
+    workers=args.workers,
+    chunk_size=args.chunk_size << 20
+  )
+  writer = csv.writer(sys.stdout)
+  writer.writerow(["release", "count"] + [f"{c}_{s}" for c in release_buckets.value_columns for s in ("sum", "min", "max")])
+  for quarter, result in release_buckets.aggregate().items():
+    writer.writerow(
+      [quarter.release, result["count"]] +
+      [result[c][s] for c in release_buckets.value_columns for s in ("sum", "min", "max")]
+    )
+  end = datetime.now()
+  print(f"start = {start}, end = {end}, delta = {end - start}", file=sys.stderr)
@@ -0,0 +1,32 @@
+import numpy as np
+
+from timeit import default_timer
+from QRelease2 import QRelease2
+
+
+NUMBER_OF_DATES = 100000
+
+
+if __name__ == "__main__":
+  rng = np.random.default_rng(seed=1985)
+  dates = np.datetime64("1990-01-01") + rng.integers(0, 365 * 40, NUMBER_OF_DATES).astype("timedelta64[D]")
+  date_strs = [str(d) for d in dates]
+
+  for every in (1, 2, 3, 4, 6, 12):
+    start = default_timer()
+    one_by_one = [QRelease2(query_date=d, every=every, num_rels=0).current.release for d in date_strs]
+    one_by_one_secs = default_timer() - start
+
+    start = default_timer()
+    in_bulk = QRelease2.classify(dates, every=every)
+    in_bulk_secs = default_timer() - start
+
+    if one_by_one != in_bulk.tolist():
+      raise ValueError(f"classify does not agree with QRelease2 for every={every}.")
+    print("every {every:2d}: QRelease2 {one:8.4f}s, classify {bulk:8.4f}s ({ratio:.0f}x) for {n} dates".format(
+      every=every,
+      one=one_by_one_secs,
+      bulk=in_bulk_secs,
+      ratio=one_by_one_secs / in_bulk_secs,
+      n=NUMBER_OF_DATES
+    ))
@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from statistics import median
+from timeit import default_timer
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_command(command, runs):
+  timings = list()
+  for _ in range(runs):
+    start = default_timer()
+    subprocess.run([sys.executable] + command, cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+    timings.append(default_timer() - start)
+  return median(timings) * 1000
+
+
+def slowest_imports(command, top):
+  """
+  slowest_imports: the modules with the biggest cumulative import time, from python -X importtime.
+  """
+  proc = subprocess.run([sys.executable, "-X", "importtime"] + command, cwd=HERE, check=True,
+                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+  imports = list()
+  for line in proc.stderr.splitlines()[1:]:
+    _, cumulative, module = line.split("|")
+    imports.append((int(cumulative.split(":")[-1]), module.strip()))
+  return sorted(imports, reverse=True)[:top]
+
+
+def parse_args(system_args):
+  parser = argparse.ArgumentParser(description="time how long qrelease takes to start.")
+  parser.add_argument("-m",
+                      "--max-ms",
+                      type=float,
+                      default=None,
+                      help="exit with 1 when qrel.py takes longer than this many milliseconds.")
+  parser.add_argument("-r",
+                      "--runs",
+                      type=int,
+                      default=20,
+                      help="number of runs of every command, defaults to 20.")
+  return parser.parse_args(system_args)
+
+
+if __name__ == "__main__":
+  args = parse_args(sys.argv[1:])
+  calendar_file = os.path.join(tempfile.mkdtemp(), "calendar.json")
+  subprocess.run([sys.executable, "qrel.py", "-b", "2000", "2050", "-c", calendar_file],
+                 cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+  commands = {
+    "qrel.py (calendar)": ["qrel.py", "-n", "2", "-c", calendar_file],
+    "qrel.py (no calendar)": ["qrel.py", "-n", "2", "-c", os.devnull],
+    "import QRelease2": ["-c", "from QRelease2 import QRelease2"],
+    "import qrelease": ["-c", "from qrelease import QRelease"],
+  }
+  # the baseline: an interpreter that does nothing.
+  baseline = time_command(["-c", "pass"], args.runs)
+  print(f"{'python -c pass':>24}: {baseline:8.2f}ms")
+  results = dict()
+  for name, command in commands.items():
+    results[name] = time_command(command, args.runs)
+    print(f"{name:>24}: {results[name]:8.2f}ms (+{results[name] - baseline:.2f}ms)")
+  print("\nslowest imports of qrel.py:")
+  for cumulative, module in slowest_imports(commands["qrel.py (calendar)"], top=5):
+    print(f"{module:>24}: {cumulative / 1000:8.2f}ms")
+  os.remove(calendar_file)
+  if args.max_ms is not None and results["qrel.py (calendar)"] > args.max_ms:
+    print(f"\nqrel.py took longer than {args.max_ms}ms to start!")
+    sys.exit(1)
@@ -0,0 +1,140 @@
+#! /usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+
+from datetime import date
+
+
+CALENDAR_FILE = os.path.join(os.path.expanduser("~"), ".cache", "qrelease", "calendar.json")
+FIELDS = ("release", "abbreviation", "folder_str")
+
+
+def not_negative(value):
+  """
+  not_negative: an argparse type for counts that can be 0 but not less.
+  :param value: (str) the argument.
+  :return: (int) the count
+  """
+  count = int(value)
+  if count < 0:
+    raise argparse.ArgumentTypeError(f"can't be negative, not <{value}>.")
+  return count
+
+
+def build_calendar(from_year, to_year, calendar_file=CALENDAR_FILE):
+  """
+  build_calendar: work out the release of every month of the year range, for every release period.
+  :param from_year: (int) the first year of the calendar.
+  :param to_year: (int) the last year of the calendar.
+  :param calendar_file: (str) where to keep the calendar.
+  :return: None
+  """
+  from QRelease2 import QRelease2
+  first_month = date(from_year, 1, 1)
+  calendar = {"from_ordinal": from_year * 12, "to_ordinal": to_year * 12 + 11, "every": dict()}
+  for every in (1, 2, 3, 4, 6, 12):
+    # pad a year either side, so the previous and next releases of the edges are in there too.
+    q_release = QRelease2(query_date=first_month.isoformat(), every=every, num_rels=12 // every)
+    first = q_release.prev_releases[-1]
+    releases = list()
+    for quarter in q_release.iter_forward(first):
+      if quarter.year > to_year + 1:
+        break
+      releases.append(quarter.release)
+    calendar["every"][str(every)] = {"first_ordinal": first.ordinal, "releases": releases}
+  os.makedirs(os.path.dirname(os.path.abspath(calendar_file)), exist_ok=True)
+  temp_file = f"{calendar_file}.{os.getpid()}"
+  with open(temp_file, "w") as calendar_fh:
+    json.dump(calendar, calendar_fh, separators=(",", ":"))
+  os.replace(temp_file, calendar_file)
+
+
+def from_calendar(query_date, every, num_rels, calendar_file=CALENDAR_FILE):
+  """
+  from_calendar: look the releases up in the calendar.
+  :param query_date: (date) the date in question.
+  :param every: (int) the release period.
+  :param num_rels: (int) number of previous and next releases.
+  :return: (list) the releases in YYYY.MM format from oldest to newest, or None when the calendar can't tell.
+  """
+  try:
+    with open(calendar_file) as calendar_fh:
+      calendar = json.load(calendar_fh)
+  except (OSError, ValueError):
+    return None
+  from Quarter import Quarter
+  month_ordinal = query_date.year * 12 + query_date.month - 1
+  table = calendar["every"].get(str(every))
+  if table is None or not calendar["from_ordinal"] <= month_ordinal <= calendar["to_ordinal"]:
+    return None
+  current = (Quarter.start_ordinal(month_ordinal, every) - table["first_ordinal"]) // every
+  if current - num_rels < 0 or current + num_rels >= len(table["releases"]):
+    return None
+  return table["releases"][current - num_rels:current + num_rels + 1]
+
+
+def from_qrelease2(query_date, every, num_rels, field):
+  from QRelease2 import QRelease2
+  q_release = QRelease2(query_date=query_date.isoformat(), every=every, num_rels=num_rels)
+  quarters = q_release.prev_releases[::-1] + [q_release.current] + q_release.next_releases
+  return [getattr(q, field) for q in quarters]
+
+
+def format_release(release, field):
+  if field == "abbreviation":
+    return release[2:4] + release[5:7]
+  if field == "folder_str":
+    return release.replace(".", "_")
+  return release
+
+
+def parse_args(system_args):
+  parser = argparse.ArgumentParser(description="what's the release?")
+  parser.add_argument("-b",
+                      "--build-calendar",
+                      nargs=2,
+                      type=int,
+                      metavar=("FROM_YEAR", "TO_YEAR"),
+                      default=None,
+                      help="build the release calendar of the year range.")
+  parser.add_argument("-c",
+                      "--calendar",
+                      default=CALENDAR_FILE,
+                      help=f"the release calendar file, defaults to {CALENDAR_FILE}.")
+  parser.add_argument("-d",
+                      "--date",
+                      type=date.fromisoformat,
+                      default=date.today(),
+                      help="the date in YYYY-MM-DD format, defaults to today.")
+  parser.add_argument("-e",
+                      "--every",
+                      type=int,
+                      choices=(1, 2, 3, 4, 6, 12),
+                      default=3,
+                      help="the release period, defaults to 3.")
+  parser.add_argument("-f",
+                      "--field",
+                      choices=FIELDS,
+                      default="release",
+                      help="what to print for every release, defaults to release.")
+  parser.add_argument("-n",
+                      "--num-rels",
+                      type=not_negative,
+                      default=0,
+                      help="number of previous and next releases to print as well, defaults to 0.")
+  return parser.parse_args(system_args)
+
+
+if __name__ == "__main__":
+  args = parse_args(sys.argv[1:])
+  if args.build_calendar is not None:
+    build_calendar(*args.build_calendar, calendar_file=args.calendar)
+  releases = from_calendar(args.date, args.every, args.num_rels, calendar_file=args.calendar)
+  if releases is None:
+    releases = from_qrelease2(args.date, args.every, args.num_rels, args.field)
+  else:
+    releases = [format_release(r, args.field) for r in releases]
+  sys.stdout.write("".join(r + "\n" for r in releases))
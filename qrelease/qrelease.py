@@ -1,6 +1,6 @@
 from re import search
-from tabulate import tabulate
 from datetime import datetime
+from Quarter import Quarter
 
 
 class QRelease:
@@ -26,6 +26,10 @@ class QRelease:
       nShort(str): next release in YYMM format.
       nYear(str): next release year.
       nMth(str): next release month.
+      curQuarter(Quarter): current release.
+      prvQuarter(Quarter): previous release.
+      ppQuarter(Quarter): two releases before.
+      nQuarter(Quarter): next release.
   """
 
   def __init__(self, start=datetime.now(), args=None, monthly=False):
@@ -68,6 +72,11 @@ class QRelease:
     self.nYear, self.nMth = self.getYearMonth(nYear, nMth)
     self.nRel, self.nShort = self.getTuple(self.nYear, self.nMth)
 
+    self.curQuarter = self.getQuarter(self.curYear, self.curMth)
+    self.prvQuarter = self.getQuarter(self.prvYear, self.prvMth)
+    self.ppQuarter = self.getQuarter(self.ppYear, self.ppMth)
+    self.nQuarter = self.getQuarter(self.nYear, self.nMth)
+
   def getYearMonth(self, year, month):
     """
     getYearMonth: takes the given year and month and returns the current release year and month.
@@ -107,7 +116,20 @@ class QRelease:
     short = "%s%s" % (str(year)[-2:], month)
     return (rel, short)
 
+  def getQuarter(self, year, month):
+    """
+    getQuarter: takes the year and month of the release and returns its Quarter.
+    Args:
+        year(str): the year of the release.
+        month(str): the month of the release.
+    Returns:
+        quarter(Quarter): the release as a Quarter.
+    """
+    return Quarter.from_ordinal(int(year) * 12 + int(month) - 1)
+
   def __repr__(self):
+    # tabulate is only needed for display, so it isn't imported until then.
+    from tabulate import tabulate
     headers = ["Item", "Release", "Abbr", "Year", "Month"]
     dispTable = []
     dispTable.append(["Current", self.curRel, self.curShort, self.curYear, self.curMth])
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+
+from DockerIgnore import DockerIgnore
+from threading import Lock
+
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "shin_yoonbok", "build_cache.json")
+
+
+class BuildCache:
+  """
+  BuildCache: remembers which image was built from which build context.
+  The context is hashed the way docker would see it, honoring .dockerignore, and every file
+  digest is kept with its size and mtime, so unchanged files aren't read again.
+  One cache can be shared by the builders running at the same time.
+  :param cache_file: (str) where to keep the cache, defaults to ~/.cache/shin_yoonbok/build_cache.json.
+  """
+  def __init__(self, cache_file=CACHE_FILE):
+    self.cache_file = cache_file
+    try:
+      with open(self.cache_file) as cache_fh:
+        cache = json.load(cache_fh)
+    except (OSError, ValueError):
+      cache = dict()
+    self.files = cache.get("files", dict())
+    self.images = cache.get("images", dict())
+    self._lock = Lock()
+
+  def __repr__(self):
+    return """
+BuildCache(
+  <cache file = {o.cache_file}>
+  <contexts = {contexts}>
+  <images = {images}>
+)
+    """.format(o=self, contexts=len(self.files), images=len(self.images))
+
+  @staticmethod
+  def _file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_fh:
+      for block in iter(lambda: file_fh.read(1 << 20), b""):
+        digest.update(block)
+    return digest.hexdigest()
+
+  def context_hash(self, work_dir, dockerfile="Dockerfile", base_images=None):
+    """
+    context_hash: the hash of the build context and the dockerfile.
+    :param work_dir: (str) the build context.
+    :param dockerfile: (str) the name of the dockerfile.
+    :param base_images: (list) the IDs of the images it's built from, when they were just built.
+    :return: (str) the hex digest
+    """
+    work_dir = os.path.abspath(work_dir)
+    with self._lock:
+      previous_files = self.files.get(work_dir, dict())
+    current_files = dict()
+    context = hashlib.sha256()
+    context.update(f"dockerfile:{dockerfile}\n".encode())
+    # a new base image means a new image, even when nothing else changed.
+    for image_id in sorted(base_images or []):
+      context.update(f"from:{image_id}\n".encode())
+    for rel_path, entry in DockerIgnore(work_dir=work_dir, dockerfile=dockerfile).walk():
+      entry_stat = entry.stat(follow_symlinks=False)
+      if stat.S_ISLNK(entry_stat.st_mode):
+        content = "link:" + os.readlink(entry.path)
+      elif stat.S_ISDIR(entry_stat.st_mode):
+        content = "dir"
+      else:
+        # only read the file when its size or mtime changed since the last time.
+        previous = previous_files.get(rel_path)
+        if previous is not None and previous[:2] == [entry_stat.st_size, entry_stat.st_mtime_ns]:
+          file_digest = previous[2]
+        else:
+          file_digest = self._file_digest(entry.path)
+        current_files[rel_path] = [entry_stat.st_size, entry_stat.st_mtime_ns, file_digest]
+        content = file_digest
+      # the executable bit ends up in the image, so it's part of the hash.
+      context.update(f"{rel_path}\0{stat.S_IMODE(entry_stat.st_mode) & 0o111:o}\0{content}\n".encode())
+    with self._lock:
+      self.files[work_dir] = current_files
+    return context.hexdigest()
+
+  def lookup(self, context_hash):
+    with self._lock:
+      return self.images.get(context_hash)
+
+  def store(self, context_hash, image_id):
+    with self._lock:
+      self.images[context_hash] = image_id
+    self.save()
+
+  def save(self):
+    cache_dir = os.path.dirname(os.path.abspath(self.cache_file))
+    os.makedirs(cache_dir, exist_ok=True)
+    # every save writes its own temp file, so two saves never trip over each other's.
+    temp_fd, temp_file = tempfile.mkstemp(dir=cache_dir, prefix=os.path.basename(self.cache_file) + ".")
+    try:
+      with self._lock, os.fdopen(temp_fd, "w") as cache_fh:
+        json.dump({"files": self.files, "images": self.images}, cache_fh)
+        cache_fh.flush()
+        os.replace(temp_file, self.cache_file)
+    except BaseException:
+      if os.path.exists(temp_file):
+        os.remove(temp_file)
+      raise
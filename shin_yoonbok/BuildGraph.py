@@ -0,0 +1,246 @@
+import argparse
+import os
+import re
+
+from BuildCache import BuildCache, CACHE_FILE
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from ImageBuilder import ImageBuilder, at_least_one
+
+
+FROM_LINE = re.compile(r"^\s*FROM\s+(?:--\S+\s+)*(?P<image>\S+)(?:\s+AS\s+(?P<stage>\S+))?", re.IGNORECASE)
+
+
+class BuildGraph:
+  """
+  BuildGraph: builds every image under a root directory, in the order of their FROM lines.
+  Images that don't depend on each other are built at the same time, and tagged with the
+  same rules as ImageBuilder, so the images depending on them can find them.
+  :param root_dir: (str) where to look for dockerfiles.
+  :param dockerfile: (str) the name of the dockerfiles, defaults to Dockerfile.
+  :param workers: (int) number of images to build at the same time, defaults to 2.
+  :param push: (bool) push every image after building it, defaults to False.
+  :param builder_kwargs: the rest are handed to every ImageBuilder.
+  """
+  def __init__(self, root_dir=os.getcwd(), dockerfile="Dockerfile", workers=2, push=False, **builder_kwargs):
+    self.root_dir = os.path.abspath(root_dir)
+    self.dockerfile = dockerfile
+    self.workers = workers
+    self.push = push
+    # one cache for every builder, so the builds running at the same time don't lose each other's entries.
+    self.build_cache = BuildCache(cache_file=builder_kwargs.pop("cache_file", None) or CACHE_FILE)
+    self.builders = dict()
+    for work_dir in self.find_work_dirs():
+      self.builders[work_dir] = ImageBuilder(
+        work_dir=work_dir,
+        dockerfile=self.dockerfile,
+        build_cache=self.build_cache,
+        **builder_kwargs
+      )
+    self.dependencies = self.get_dependencies()
+    self.results = dict()
+    self.image_ids = dict()
+
+  def __repr__(self):
+    return """
+BuildGraph(
+  <root dir = {o.root_dir}>
+  <dockerfile = {o.dockerfile}>
+  <workers = {o.workers}>
+  <push = {o.push}>
+  <images = {images}>
+  <dependencies = {dependencies}>
+)
+    """.format(
+      o=self,
+      images=len(self.builders),
+      dependencies={self._name(d): [self._name(p) for p in ps] for d, ps in self.dependencies.items() if ps}
+    )
+
+  def _name(self, work_dir):
+    return os.path.relpath(work_dir, self.root_dir)
+
+  def find_work_dirs(self):
+    work_dirs = list()
+    for dir_path, dir_names, file_names in os.walk(self.root_dir):
+      dir_names[:] = sorted(d for d in dir_names if not d.startswith("."))
+      if self.dockerfile in file_names:
+        work_dirs.append(dir_path)
+    return work_dirs
+
+  @staticmethod
+  def parse_from_lines(dockerfile_path):
+    """
+    parse_from_lines: the images the dockerfile is built from, leaving out its own stages.
+    :param dockerfile_path: (str) the dockerfile.
+    :return: (set) the repositories, without tags or digests
+    """
+    images = set()
+    stages = set()
+    with open(dockerfile_path) as dockerfile_fh:
+      for line in dockerfile_fh:
+        match = FROM_LINE.match(line)
+        if match is None:
+          continue
+        image = match.group("image").split("@")[0]
+        repo, _, tag = image.rpartition(":")
+        if repo == "" or "/" in tag:
+          repo = image
+        if repo.lower() not in stages:
+          images.add(repo)
+        if match.group("stage") is not None:
+          stages.add(match.group("stage").lower())
+    return images
+
+  def get_dependencies(self):
+    """
+    get_dependencies: which images every image is built from, by matching the FROM lines
+    against the repos ImageBuilder.get_repos gives the other images.
+    :return: (dict) work dir -> set of work dirs it depends on
+    """
+    repo_owners = dict()
+    for work_dir, builder in self.builders.items():
+      for repo in builder.repos:
+        repo_owners[repo] = work_dir
+    dependencies = dict()
+    for work_dir, builder in self.builders.items():
+      dependencies[work_dir] = {
+        repo_owners[repo] for repo in self.parse_from_lines(builder.dockerfile_path)
+        if repo in repo_owners and repo_owners[repo] != work_dir
+      }
+    return dependencies
+
+  def _build_one(self, work_dir):
+    builder = self.builders[work_dir]
+    start = datetime.now(tz=timezone.utc)
+    # the images it depends on are built by now, and a new one of them means a new build of this one.
+    new_image = builder.build_image(base_images=[self.image_ids[dep] for dep in self.dependencies[work_dir]])
+    self.image_ids[work_dir] = new_image.id
+    builder.tag_image(target_image=new_image)
+    if self.push is True:
+      push_results = builder.push_image(target_image=new_image)
+      if not all(result["ok"] for result in push_results):
+        raise ValueError(f"unable to push {self._name(work_dir)}.")
+    return (datetime.now(tz=timezone.utc) - start).total_seconds()
+
+  def build_all(self):
+    """
+    build_all: build every image as soon as the images it depends on are built.
+    When an image fails, the images depending on it are skipped.
+    :return: (dict) work dir -> {"status": built / failed / skipped, "seconds": float, "error": str}
+    """
+    waiting_on = {work_dir: set(deps) for work_dir, deps in self.dependencies.items()}
+    dependents = {work_dir: set() for work_dir in self.builders}
+    for work_dir, deps in self.dependencies.items():
+      for dep in deps:
+        dependents[dep].add(work_dir)
+    self.results = dict()
+    self.image_ids = dict()
+    with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+      running = dict()
+      while len(waiting_on) > 0 or len(running) > 0:
+        for work_dir in sorted(w for w, deps in waiting_on.items() if len(deps) == 0):
+          del waiting_on[work_dir]
+          running[executor.submit(self._build_one, work_dir)] = work_dir
+        if len(running) == 0:
+          raise ValueError(f"the images depend on each other: {sorted(self._name(w) for w in waiting_on)}")
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+          work_dir = running.pop(future)
+          try:
+            self.results[work_dir] = {"status": "built", "seconds": future.result(), "error": None}
+            for dependent in dependents[work_dir]:
+              waiting_on[dependent].discard(work_dir)
+          except Exception as err:
+            self.results[work_dir] = {"status": "failed", "seconds": 0.0, "error": str(err)}
+            self._skip_dependents(work_dir, dependents, waiting_on)
+    return self.results
+
+  def _skip_dependents(self, work_dir, dependents, waiting_on):
+    for dependent in dependents[work_dir]:
+      if dependent in waiting_on:
+        del waiting_on[dependent]
+        self.results[dependent] = {
+          "status": "skipped", "seconds": 0.0, "error": f"{self._name(work_dir)} was not built."
+        }
+        self._skip_dependents(dependent, dependents, waiting_on)
+
+  def critical_path(self):
+    """
+    critical_path: the chain of images that took the longest, the least time the builds could have taken.
+    :return: (tuple) the work dirs of the chain, and its total seconds
+    """
+    finished = dict()
+
+    def finish_time(work_dir):
+      if work_dir not in finished:
+        before = max(self.dependencies[work_dir], key=lambda d: finish_time(d)[0], default=None)
+        seconds = self.results.get(work_dir, {}).get("seconds", 0.0)
+        finished[work_dir] = (seconds + (finish_time(before)[0] if before else 0.0), before)
+      return finished[work_dir]
+
+    last = max(self.builders, key=lambda w: finish_time(w)[0], default=None)
+    seconds = 0.0 if last is None else finished[last][0]
+    chain = list()
+    while last is not None:
+      chain.append(last)
+      last = finished[last][1]
+    return chain[::-1], seconds
+
+  def show_results(self):
+    print("\nimages:\n")
+    for work_dir in self.builders:
+      result = self.results.get(work_dir, {"status": "not built", "seconds": 0.0, "error": None})
+      error = "" if result["error"] is None else " - {error}".format(error=result["error"])
+      print("{name:>40}: {r[status]:>9} ({r[seconds]:.1f}s){error}".format(name=self._name(work_dir), r=result, error=error))
+    chain, seconds = self.critical_path()
+    print("\ncritical path ({seconds:.1f}s): {chain}\n".format(
+      seconds=seconds,
+      chain=" -> ".join(self._name(w) for w in chain)
+    ))
+
+  @staticmethod
+  def parse_args(system_args):
+    parser = argparse.ArgumentParser(description="Yoonbok paints them all.")
+    parser.add_argument("-d",
+                        "--debug",
+                        default=False,
+                        action="store_true",
+                        help="show verbose info, defaults to false.")
+    parser.add_argument("-f",
+                        "--file",
+                        default="Dockerfile",
+                        help="name of the docker files, defaults to Dockerfile.")
+    parser.add_argument("--force-push",
+                        default=False,
+                        action="store_true",
+                        help="push every tag, even when the registry already has the same manifest.")
+    parser.add_argument("-j",
+                        "--jobs",
+                        type=at_least_one,
+                        default=2,
+                        help="number of images to build at the same time, defaults to 2.")
+    parser.add_argument("-n",
+                        "--rebuild",
+                        default=False,
+                        action="store_true",
+                        help="build the images even if their build contexts haven't changed.")
+    parser.add_argument("--push",
+                        default=False,
+                        action="store_true",
+                        help="push every image after building it.")
+    parser.add_argument("-p",
+                        "--push-workers",
+                        type=at_least_one,
+                        default=1,
+                        help="number of pushes to run at the same time per image, defaults to 1.")
+    parser.add_argument("-r",
+                        "--root-dir",
+                        default=os.getcwd(),
+                        help="where to look for docker files, defaults to current directory.")
+    parser.add_argument("-t",
+                        "--tags",
+                        nargs="*",
+                        default=None,
+                        help="additional tags to add to the images.")
+    return parser.parse_args(system_args)
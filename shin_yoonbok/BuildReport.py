@@ -0,0 +1,121 @@
+import json
+import re
+
+from datetime import datetime, timezone
+
+
+STEP_LINE = re.compile(r"^Step (?P<step>\d+)/(?P<total>\d+) : (?P<instruction>.*)$")
+BUILT_LINE = re.compile(r"^Successfully built (?P<id>[0-9a-f]+)$")
+
+
+class BuildReport:
+  """
+  BuildReport: turns the build output into step events, as it comes.
+  Every step gets its number, instruction, whether the cache was used, and how long it took.
+  :param work_dir: (str) the build context, for the report.
+  """
+  def __init__(self, work_dir):
+    self.work_dir = work_dir
+    self.steps = list()
+    self.image_id = None
+    self.error = None
+    self.start = datetime.now(tz=timezone.utc)
+    self.end = None
+    self._step_start = None
+
+  def __repr__(self):
+    return """
+BuildReport(
+  <work_dir = {o.work_dir}>
+  <image id = {o.image_id}>
+  <steps = {steps}>
+  <cache hits = {o.cache_hits}>
+  <seconds = {seconds:.1f}>
+)
+    """.format(o=self, steps=len(self.steps), seconds=self.seconds)
+
+  def _close_step(self, now):
+    if len(self.steps) > 0 and self.steps[-1]["seconds"] is None:
+      self.steps[-1]["seconds"] = (now - self._step_start).total_seconds()
+
+  def feed(self, event):
+    """
+    feed: take one decoded event of the docker build API.
+    :param event: (dict) such as {"stream": "Step 1/3 : FROM alpine"}.
+    :return: None
+    """
+    now = datetime.now(tz=timezone.utc)
+    if "error" in event:
+      self.error = event["error"]
+      return
+    if "aux" in event and "ID" in event["aux"]:
+      self.image_id = event["aux"]["ID"]
+      return
+    for line in event.get("stream", "").splitlines():
+      line = line.strip()
+      step_match = STEP_LINE.match(line)
+      if step_match is not None:
+        self._close_step(now)
+        self._step_start = now
+        self.steps.append({
+          "step": int(step_match.group("step")),
+          "total": int(step_match.group("total")),
+          "instruction": step_match.group("instruction"),
+          "cached": False,
+          "seconds": None,
+        })
+      elif line == "---> Using cache" and len(self.steps) > 0:
+        self.steps[-1]["cached"] = True
+      elif BUILT_LINE.match(line) is not None and self.image_id is None:
+        self.image_id = BUILT_LINE.match(line).group("id")
+
+  def finish(self):
+    self.end = datetime.now(tz=timezone.utc)
+    self._close_step(self.end)
+
+  @property
+  def seconds(self):
+    return ((self.end or datetime.now(tz=timezone.utc)) - self.start).total_seconds()
+
+  @property
+  def cache_hits(self):
+    return sum(1 for step in self.steps if step["cached"] is True)
+
+  @property
+  def cache_ratio(self):
+    if len(self.steps) == 0:
+      return 0.0
+    return self.cache_hits / len(self.steps)
+
+  def slowest_steps(self, top=5):
+    return sorted(self.steps, key=lambda step: step["seconds"] or 0.0, reverse=True)[:top]
+
+  def to_dict(self, top=5):
+    return {
+      "work_dir": self.work_dir,
+      "image_id": self.image_id,
+      "error": self.error,
+      "start": self.start.isoformat(),
+      "seconds": self.seconds,
+      "cache_hits": self.cache_hits,
+      "cache_ratio": self.cache_ratio,
+      "slowest_steps": self.slowest_steps(top=top),
+      "steps": self.steps,
+    }
+
+  def write(self, report_file, top=5):
+    with open(report_file, "w") as report_fh:
+      json.dump(self.to_dict(top=top), report_fh, indent=2)
+
+  def show(self, top=5):
+    print("\nbuild took {seconds:.1f}s, {hits} of {steps} steps from cache ({ratio:.0%}).".format(
+      seconds=self.seconds,
+      hits=self.cache_hits,
+      steps=len(self.steps),
+      ratio=self.cache_ratio
+    ))
+    for step in self.slowest_steps(top=top):
+      print("{s[seconds]:8.1f}s  step {s[step]}/{s[total]}{cached}: {s[instruction]}".format(
+        s=step,
+        cached=" (cached)" if step["cached"] else ""
+      ))
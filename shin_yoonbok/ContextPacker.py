@@ -0,0 +1,146 @@
+import heapq
+import os
+import stat
+import tarfile
+import zlib
+
+from DockerIgnore import DockerIgnore
+
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+CHUNK_SIZE = 1 << 20
+
+
+class ContextPacker:
+  """
+  ContextPacker: streams the build context as a tar archive, a chunk at a time.
+  Only the files .dockerignore lets through are packed, and the archive is never held in memory,
+  so it can be handed straight to the build call. It keeps count of what went in as it goes.
+  :param work_dir: (str) the build context.
+  :param dockerfile: (str) the name of the dockerfile, defaults to Dockerfile.
+  :param compress: (bool) gzip the archive, defaults to False.
+  :param top: (int) how many of the largest paths and directories to show, defaults to 10.
+  """
+  def __init__(self, work_dir, dockerfile="Dockerfile", compress=False, top=10):
+    self.work_dir = work_dir
+    self.dockerfile = dockerfile
+    self.compress = compress
+    self.top = top
+    self.docker_ignore = DockerIgnore(work_dir=self.work_dir, dockerfile=self.dockerfile)
+    self.files = 0
+    self.context_size = 0
+    self.archive_size = 0
+    self.dir_sizes = dict()
+    self._largest = list()
+
+  def __repr__(self):
+    return """
+ContextPacker(
+  <work_dir = {o.work_dir}>
+  <compress = {o.compress}>
+  <files = {o.files}>
+  <context size = {o.context_size}>
+  <archive size = {o.archive_size}>
+)
+    """.format(o=self)
+
+  @property
+  def encoding(self):
+    return "gzip" if self.compress is True else None
+
+  def _count(self, rel_path, size):
+    self.files += 1
+    self.context_size += size
+    # the files at the top of the context count towards "."
+    top_dir = rel_path.split("/")[0] if "/" in rel_path else "."
+    self.dir_sizes[top_dir] = self.dir_sizes.get(top_dir, 0) + size
+    if len(self._largest) < self.top:
+      heapq.heappush(self._largest, (size, rel_path))
+    elif size > self._largest[0][0]:
+      heapq.heappushpop(self._largest, (size, rel_path))
+
+  def largest_paths(self):
+    return sorted(self._largest, reverse=True)
+
+  def largest_dirs(self):
+    """
+    largest_dirs: the top level directories of the context that take the most room.
+    :return: (list) of (size, directory), the largest first
+    """
+    return sorted(((size, top_dir) for top_dir, size in self.dir_sizes.items()), reverse=True)[:self.top]
+
+  def _tar_blocks(self):
+    """
+    _tar_blocks: the tar archive, header by header and file chunk by file chunk.
+    Owners are set to root, the same as the docker cli does.
+    """
+    for rel_path, entry in self.docker_ignore.walk():
+      entry_stat = entry.stat(follow_symlinks=False)
+      tar_info = tarfile.TarInfo(rel_path)
+      tar_info.mode = stat.S_IMODE(entry_stat.st_mode)
+      tar_info.mtime = int(entry_stat.st_mtime)
+      if stat.S_ISDIR(entry_stat.st_mode):
+        tar_info.type = tarfile.DIRTYPE
+      elif stat.S_ISLNK(entry_stat.st_mode):
+        tar_info.type = tarfile.SYMTYPE
+        tar_info.linkname = os.readlink(entry.path)
+      elif stat.S_ISREG(entry_stat.st_mode):
+        tar_info.size = entry_stat.st_size
+      else:
+        continue
+      yield tar_info.tobuf(format=tarfile.PAX_FORMAT)
+      if not tar_info.isreg():
+        continue
+      self._count(rel_path, tar_info.size)
+      if tar_info.size == 0:
+        continue
+      remaining = tar_info.size
+      with open(entry.path, "rb") as file_fh:
+        while remaining > 0:
+          chunk = file_fh.read(min(CHUNK_SIZE, remaining))
+          if len(chunk) == 0:
+            # the file shrank while we were packing it, keep the archive in one piece.
+            chunk = bytes(min(CHUNK_SIZE, remaining))
+          remaining -= len(chunk)
+          yield chunk
+      padding = -tar_info.size % BLOCK_SIZE
+      if padding > 0:
+        yield bytes(padding)
+    yield bytes(BLOCK_SIZE * 2)
+
+  def stream(self):
+    """
+    stream: the archive in chunks of about CHUNK_SIZE, gzipped if asked to.
+    :return: generator of bytes
+    """
+    self.files = 0
+    self.context_size = 0
+    self.archive_size = 0
+    self.dir_sizes = dict()
+    self._largest = list()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if self.compress is True else None
+    buffer = bytearray()
+    for block in self._tar_blocks():
+      buffer += compressor.compress(block) if compressor is not None else block
+      if len(buffer) >= CHUNK_SIZE:
+        self.archive_size += len(buffer)
+        yield bytes(buffer)
+        buffer.clear()
+    if compressor is not None:
+      buffer += compressor.flush()
+    if len(buffer) > 0:
+      self.archive_size += len(buffer)
+      yield bytes(buffer)
+
+  def show(self):
+    print("\nbuild context: {o.files} files, {size:.1f}MB, sent {sent:.1f}MB.".format(
+      o=self,
+      size=self.context_size / (1 << 20),
+      sent=self.archive_size / (1 << 20)
+    ))
+    print("largest directories:")
+    for size, top_dir in self.largest_dirs():
+      print("{size:10.1f}MB  {path}".format(size=size / (1 << 20), path=top_dir))
+    print("largest files:")
+    for size, rel_path in self.largest_paths():
+      print("{size:10.1f}MB  {path}".format(size=size / (1 << 20), path=rel_path))
@@ -0,0 +1,124 @@
+import os
+import re
+
+
+class DockerIgnore:
+  """
+  DockerIgnore: the .dockerignore patterns of a build context, compiled once.
+  The rules are the same as docker's: paths are relative to the context, * and ? don't cross
+  a /, ** matches any number of directories, a ! pattern re-includes, and the last match wins.
+  Excluding a directory excludes everything in it.
+  :param work_dir: (str) the build context.
+  :param dockerfile: (str) the name of the dockerfile, always sent along like docker does.
+  """
+  def __init__(self, work_dir, dockerfile="Dockerfile"):
+    self.work_dir = work_dir
+    self.dockerfile = dockerfile
+    self.patterns = list()
+    ignore_file = os.path.join(self.work_dir, ".dockerignore")
+    if os.path.isfile(ignore_file):
+      with open(ignore_file) as ignore_fh:
+        for line in ignore_fh:
+          self.add_pattern(line)
+    self.has_exceptions = any(exception for exception, _ in self.patterns)
+
+  def __repr__(self):
+    return """
+DockerIgnore(
+  <work_dir = {o.work_dir}>
+  <patterns = {patterns}>
+)
+    """.format(o=self, patterns=[p.pattern for _, p in self.patterns])
+
+  def add_pattern(self, line):
+    pattern = line.strip()
+    if len(pattern) == 0 or pattern.startswith("#"):
+      return
+    exception = pattern.startswith("!")
+    if exception is True:
+      pattern = pattern[1:].strip()
+    pattern = os.path.normpath(pattern).lstrip("/")
+    if pattern in ("", "."):
+      return
+    self.patterns.append((exception, re.compile(self.to_regex(pattern))))
+
+  @staticmethod
+  def to_regex(pattern):
+    """
+    to_regex: turn a .dockerignore pattern into a regular expression.
+    :param pattern: (str) the cleaned up pattern.
+    :return: (str) the regular expression
+    """
+    regex = ""
+    n = 0
+    while n < len(pattern):
+      char = pattern[n]
+      if pattern.startswith("**/", n):
+        regex += "(?:.*/)?"
+        n += 3
+        continue
+      if pattern.startswith("**", n):
+        regex += ".*"
+        n += 2
+        continue
+      if char == "*":
+        regex += "[^/]*"
+      elif char == "?":
+        regex += "[^/]"
+      elif char == "[":
+        end = pattern.find("]", n + 1)
+        if end < 0:
+          regex += re.escape(char)
+        else:
+          char_class = pattern[n + 1:end]
+          if char_class.startswith(("!", "^")):
+            char_class = "^" + char_class[1:]
+          regex += "[" + char_class + "]"
+          n = end
+      elif char == "\\" and n + 1 < len(pattern):
+        n += 1
+        regex += re.escape(pattern[n])
+      else:
+        regex += re.escape(char)
+      n += 1
+    return "^" + regex + "$"
+
+  def is_excluded(self, rel_path):
+    """
+    is_excluded: whether the path is left out of the build context.
+    :param rel_path: (str) the path relative to the context, with / as the separator.
+    :return: (bool) True when it's excluded
+    """
+    parents = list()
+    parent = os.path.dirname(rel_path)
+    while parent not in ("", "/"):
+      parents.append(parent)
+      parent = os.path.dirname(parent)
+    excluded = False
+    for exception, regex in self.patterns:
+      if excluded is exception and (regex.match(rel_path) or any(regex.match(p) for p in parents)):
+        excluded = not exception
+    return excluded
+
+  def walk(self, rel_dir=""):
+    """
+    walk: go through the build context with os.scandir, leaving out everything that's excluded.
+    Directories are skipped as a whole unless a ! pattern could bring something back.
+    :param rel_dir: (str) the directory to start from, relative to the context.
+    :return: generator of (relative path, os.DirEntry) tuples, sorted by path
+    """
+    with os.scandir(os.path.join(self.work_dir, rel_dir)) as entries:
+      entries = sorted(entries, key=lambda e: e.name)
+    for entry in entries:
+      rel_path = entry.name if rel_dir == "" else rel_dir + "/" + entry.name
+      excluded = self.is_excluded(rel_path)
+      if excluded is True and rel_path in (self.dockerfile, ".dockerignore"):
+        excluded = False
+      if entry.is_dir(follow_symlinks=False):
+        if excluded is True and self.has_exceptions is False:
+          continue
+        if excluded is False:
+          yield rel_path, entry
+        yield from self.walk(rel_path)
+      elif excluded is False:
+        yield rel_path, entry
@@ -1,12 +1,34 @@
 import argparse
 import docker
 import os
+import requests
+import sys
 
+from BuildCache import BuildCache
+from BuildReport import BuildReport
+from ContextPacker import ContextPacker
+from RegistryClient import RegistryClient
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from threading import BoundedSemaphore
+
+
+def at_least_one(value):
+  """
+  at_least_one: an argparse type for the counts that can't be zero, a semaphore of 0 never lets a push through.
+  :param value: (str) the argument.
+  :return: (int) the count
+  """
+  count = int(value)
+  if count < 1:
+    raise argparse.ArgumentTypeError(f"has to be at least 1, not <{value}>.")
+  return count
 
 
 class ImageBuilder:
-  def __init__(self, work_dir=os.getcwd(), dockerfile="Dockerfile", debug=False, additional_tags=None):
+  def __init__(self, work_dir=os.getcwd(), dockerfile="Dockerfile", debug=False, additional_tags=None,
+               push_workers=1, registry_limit=1, rebuild=False, cache_file=None, build_report=None,
+               compress_context=False, docker_host=None, force_push=False, build_cache=None):
     self.work_dir = work_dir
     self.dir_name = os.path.basename(self.work_dir)
     self.dockerfile = dockerfile
@@ -16,9 +38,29 @@ class ImageBuilder:
       self.additional_tags = []
     else:
       self.additional_tags = additional_tags
+    if push_workers < 1 or registry_limit < 1:
+      raise ValueError(
+        f"push_workers and registry_limit have to be at least 1, not <{push_workers}> and <{registry_limit}>."
+      )
+    self.push_workers = push_workers
+    self.registry_limit = registry_limit
+    self.rebuild = rebuild
+    self.build_report = build_report
+    self.compress_context = compress_context
+    self.docker_host = docker_host
+    self.force_push = force_push
+    if build_cache is not None:
+      self.build_cache = build_cache
+    elif cache_file is None:
+      self.build_cache = BuildCache()
+    else:
+      self.build_cache = BuildCache(cache_file=cache_file)
     if not os.path.isfile(self.dockerfile_path):
       raise FileNotFoundError("the dockerfile is not found. maybe you need to specify the file name.")
-    self.dc = docker.from_env()
+    if self.docker_host is None:
+      self.dc = docker.from_env()
+    else:
+      self.dc = docker.DockerClient(base_url=self.docker_host)
     self.repos = self.get_repos()
     self.tags = self.get_tags()
 
@@ -30,21 +72,60 @@ ImageBuilder(
   <dockerfile path = {o.dockerfile_path}>
   <repos = {o.repos}>
   <tags = {o.tags}>
+  <push workers = {o.push_workers}>
+  <pushes per registry = {o.registry_limit}>
+  <rebuild = {o.rebuild}>
+  <build cache = {o.build_cache.cache_file}>
+  <build report = {o.build_report}>
+  <compress context = {o.compress_context}>
+  <docker host = {o.docker_host}>
+  <force push = {o.force_push}>
 )
     """.format(o=self)
 
   @staticmethod
   def parse_args(system_args):
     parser = argparse.ArgumentParser(description="Yoonbok + Jeonghyung = best couple.")
+    parser.add_argument("-c",
+                        "--compress",
+                        default=False,
+                        action="store_true",
+                        help="gzip the build context before sending it.")
     parser.add_argument("-d",
                         "--debug",
                         default=False,
                         action="store_true",
                         help="show verbose info, defaults to false.")
+    parser.add_argument("-b",
+                        "--build-report",
+                        default=None,
+                        help="write a json report of the build steps to this file.")
+    parser.add_argument("--docker-host",
+                        default=None,
+                        help="the docker daemon to use, such as tcp://127.0.0.1:2375, defaults to DOCKER_HOST.")
     parser.add_argument("-f",
                         "--file",
                         default="Dockerfile",
                         help="name of the docker file, defaults to Dockerfile.")
+    parser.add_argument("--force-push",
+                        default=False,
+                        action="store_true",
+                        help="push every tag, even when the registry already has the same manifest.")
+    parser.add_argument("-n",
+                        "--rebuild",
+                        default=False,
+                        action="store_true",
+                        help="build the image even if the build context hasn't changed.")
+    parser.add_argument("-p",
+                        "--push-workers",
+                        type=at_least_one,
+                        default=1,
+                        help="number of pushes to run at the same time, defaults to 1.")
+    parser.add_argument("-r",
+                        "--registry-limit",
+                        type=at_least_one,
+                        default=1,
+                        help="number of pushes to run at the same time per registry, defaults to 1.")
     parser.add_argument("-t",
                         "--tags",
                         nargs="*",
@@ -74,17 +155,69 @@ ImageBuilder(
         new_tags.add(full_tag)
     return new_tags
 
-  def build_image(self):
-    new_image = self.dc.images.build(
-      path=self.work_dir,
-      dockerfile=self.dockerfile_path,
+  def get_cached_image(self, context_hash):
+    """
+    get_cached_image: the image built from the same build context before, if it's still around.
+    :param context_hash: (str) the hash of the build context.
+    :return: the image, or None
+    """
+    image_id = self.build_cache.lookup(context_hash)
+    if image_id is None:
+      return None
+    try:
+      return self.dc.images.get(image_id)
+    except docker.errors.ImageNotFound:
+      return None
+
+  def build_image(self, base_images=None):
+    """
+    build_image: build the image, unless an image was built from the same context before.
+    :param base_images: (list) the IDs of the images it's built from, when they were just built,
+                        so a new base image means a new build.
+    :return: the image
+    """
+    context_hash = self.build_cache.context_hash(
+      work_dir=self.work_dir,
+      dockerfile=self.dockerfile,
+      base_images=base_images
+    )
+    if self.rebuild is False:
+      cached_image = self.get_cached_image(context_hash)
+      if cached_image is not None:
+        # save the file sizes and mtimes we've just seen, so the next hash is quicker.
+        self.build_cache.save()
+        print("the build context hasn't changed, reusing image {id}.".format(id=cached_image.short_id[7:]))
+        return cached_image
+    report = BuildReport(work_dir=self.work_dir)
+    packer = ContextPacker(work_dir=self.work_dir, dockerfile=self.dockerfile, compress=self.compress_context)
+    build_log = list()
+    # the context is packed while it's being sent, and the output is printed as it comes.
+    build_events = self.dc.api.build(
+      fileobj=packer.stream(),
+      custom_context=True,
+      encoding=packer.encoding,
+      dockerfile=self.dockerfile,
       rm=True,
-      quiet=False
+      decode=True
     )
-    if self.debug is True:
-      for log in new_image[1]:
-        print(log)
-    return new_image[0]
+    for event in build_events:
+      build_log.append(event)
+      report.feed(event)
+      if "stream" in event:
+        sys.stdout.write(event["stream"])
+        sys.stdout.flush()
+      elif self.debug is True:
+        print(event)
+    report.finish()
+    packer.show()
+    if self.build_report is not None:
+      report.write(self.build_report)
+    if report.error is not None or report.image_id is None:
+      raise docker.errors.BuildError(report.error or "unknown build error", build_log)
+    report.show()
+    new_image = self.dc.images.get(report.image_id)
+    self.build_cache.store(context_hash, new_image.id)
+    return new_image
 
   def tag_image(self, target_image):
     for repo in self.repos:
@@ -99,14 +232,144 @@ ImageBuilder(
       print(tag)
     print("")
 
-  def push_image(self):
-    for repo in self.repos:
-      for tag in self.tags:
+  @staticmethod
+  def get_registry(repo):
+    """
+    get_registry: the registry of the repo, the same way docker works it out.
+    :param repo: (str) the repository, such as my_first_repo_base/current_dir.
+    :return: (str) the registry host
+    """
+    first, _, rest = repo.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+      return first
+    return "docker.io"
+
+  def _check_remote(self, repo, tag, local_digests, registry_client):
+    """
+    _check_remote: compare the local image with what the registry has under repo:tag.
+    :param repo: (str) the repository.
+    :param tag: (str) the tag.
+    :param local_digests: (set) the manifest digests of the local image in this repository.
+    :param registry_client: (RegistryClient) the client of the registry.
+    :return: (str) skipped when the tag is up to date, retagged when only the tag had to move,
+             or None when it needs a push
+    """
+    if len(local_digests) == 0:
+      return None
+    if registry_client.manifest_digest(repo, tag) in local_digests:
+      return "skipped"
+    # the layers and the manifest are up there already, only the tag needs to point at it.
+    for digest in sorted(local_digests):
+      if registry_client.manifest_digest(repo, digest) == digest:
+        registry_client.retag(repo, digest, tag)
+        return "retagged"
+    return None
+
+  def _push_one(self, repo, tag, registry_limits, registry_clients=None, local_digests=None):
+    """
+    _push_one: push one repo:tag, printing the progress as it comes.
+    :param repo: (str) the repository.
+    :param tag: (str) the tag.
+    :param registry_limits: (dict) registry -> semaphore limiting the pushes to it.
+    :param registry_clients: (dict) registry -> RegistryClient, to skip what the registry already has,
+                             a registry without one is pushed to as usual.
+    :param local_digests: (set) the manifest digests of the local image in this repository.
+    :return: (dict) the result of the push
+    """
+    with registry_limits[self.get_registry(repo)]:
+      start = datetime.now(tz=timezone.utc)
+      error = None
+      action = None
+      registry_client = (registry_clients or dict()).get(self.get_registry(repo))
+      if registry_client is not None:
         try:
-          output = self.dc.images.push(repository=repo, tag=tag, stream=False)
+          action = self._check_remote(repo, tag, local_digests or set(), registry_client)
+        except Exception as err:
+          # can't tell what the registry has, pushing is always safe.
+          if isinstance(err, requests.Timeout):
+            # it won't answer the other tags any quicker, they're pushed straight away.
+            registry_clients.pop(self.get_registry(repo), None)
           if self.debug is True:
-            print(output)
-          else:
-            print(f"{repo}:{tag} is pushed.")
+            print(f"{repo}:{tag} | unable to check the registry: {err}")
+      if action is not None:
+        print(f"{repo}:{tag} | {action}, the registry already has it.")
+      else:
+        action = "pushed"
+        try:
+          for event in self.dc.api.push(repository=repo, tag=tag, stream=True, decode=True):
+            if "error" in event:
+              error = event["error"]
+            # the progress bars are very chatty, only show them in debug mode.
+            elif "progress" not in event or self.debug is True:
+              status = " ".join(str(event[k]) for k in ("id", "status", "progress") if event.get(k))
+              if len(status) > 0:
+                print(f"{repo}:{tag} | {status}")
         except Exception as err:
-          print(f"Unable to push {err}")
+          error = str(err)
+      delta = datetime.now(tz=timezone.utc) - start
+    return {
+      "repository": repo,
+      "tag": tag,
+      "action": action,
+      "ok": error is None,
+      "error": error,
+      "seconds": delta.total_seconds()
+    }
+
+  @staticmethod
+  def get_local_digests(target_image):
+    """
+    get_local_digests: the manifest digests the image is known by, per repository.
+    :param target_image: the image.
+    :return: (dict) repository -> set of digests
+    """
+    local_digests = dict()
+    for repo_digest in target_image.attrs.get("RepoDigests") or []:
+      repo, _, digest = repo_digest.partition("@")
+      local_digests.setdefault(repo, set()).add(digest)
+    return local_digests
+
+  def push_image(self, target_image=None):
+    """
+    push_image: push every repo:tag, push_workers at a time, and at most registry_limit per registry.
+    Given the image, the tags the registry already has are skipped, unless force_push is set.
+    :param target_image: the image being pushed, defaults to None.
+    :return: (list) the result of every push, see _push_one
+    """
+    pushes = [(repo, tag) for repo in sorted(self.repos) for tag in sorted(self.tags)]
+    registries = {self.get_registry(r) for r, _ in pushes}
+    registry_limits = {registry: BoundedSemaphore(self.registry_limit) for registry in registries}
+    registry_clients = None
+    local_digests = dict()
+    if target_image is not None and self.force_push is False:
+      registry_clients = dict()
+      try:
+        target_image.reload()
+        local_digests = self.get_local_digests(target_image)
+        for registry in registries:
+          registry_clients[registry] = RegistryClient(registry)
+      except Exception as err:
+        # can't tell what the registries have, pushing is always safe.
+        if self.debug is True:
+          print(f"unable to check the registries: {err}")
+    with ThreadPoolExecutor(max_workers=max(1, self.push_workers)) as executor:
+      results = list(executor.map(
+        lambda push: self._push_one(*push, registry_limits, registry_clients, local_digests.get(push[0])),
+        pushes
+      ))
+    self.show_push_results(results)
+    return results
+
+  @staticmethod
+  def show_push_results(results):
+    print("")
+    for result in results:
+      outcome = result["action"] if result["ok"] else "FAILED: {r[error]}".format(r=result)
+      print("{r[repository]}:{r[tag]} {outcome} ({r[seconds]:.1f}s)".format(r=result, outcome=outcome))
+    failed = [r for r in results if not r["ok"]]
+    skipped = [r for r in results if r["ok"] and r["action"] != "pushed"]
+    print("\n{ok} of {total} pushes succeeded, {skipped} of them were already in the registry.\n".format(
+      ok=len(results) - len(failed),
+      total=len(results),
+      skipped=len(skipped)
+    ))
@@ -0,0 +1,139 @@
+import base64
+import docker
+import requests
+
+from threading import Lock
+
+
+MANIFEST_TYPES = ", ".join((
+  "application/vnd.docker.distribution.manifest.v2+json",
+  "application/vnd.docker.distribution.manifest.list.v2+json",
+  "application/vnd.oci.image.manifest.v1+json",
+  "application/vnd.oci.image.index.v1+json",
+))
+
+
+class RegistryClient:
+  """
+  RegistryClient: talks to one registry's v2 API over a single keep-alive session.
+  It only knows what push_image needs: a manifest's digest, and copying a manifest to another tag.
+  Credentials come from the docker config, the same ones docker push uses.
+  Every request gives up after TIMEOUT, a registry that stalls is pushed to the usual way instead.
+  :param registry: (str) the registry host, such as my.registry.io:5000, or docker.io.
+  """
+  # seconds to connect, and to wait for the answer.
+  TIMEOUT = (5, 30)
+
+  def __init__(self, registry):
+    self.registry = registry
+    if registry == "docker.io":
+      self.base_url = "https://registry-1.docker.io"
+    elif registry.split(":")[0] in ("localhost", "127.0.0.1"):
+      self.base_url = f"http://{registry}"
+    else:
+      self.base_url = f"https://{registry}"
+    self.auth_config = docker.auth.resolve_authconfig(docker.auth.load_config(), registry=registry) or dict()
+    self.session = requests.Session()
+    self._tokens = dict()
+    self._lock = Lock()
+
+  def __repr__(self):
+    return """
+RegistryClient(
+  <registry = {o.registry}>
+  <base url = {o.base_url}>
+  <authenticated = {authenticated}>
+)
+    """.format(o=self, authenticated="username" in self.auth_config)
+
+  def get_name(self, repo):
+    """
+    get_name: the repository name the registry knows, without the registry host.
+    :param repo: (str) the repository, such as my.registry.io:5000/team/app.
+    :return: (str) the name, such as team/app
+    """
+    name = repo
+    if repo.startswith(self.registry + "/"):
+      name = repo[len(self.registry) + 1:]
+    if self.registry == "docker.io" and "/" not in name:
+      name = "library/" + name
+    return name
+
+  def _get_token(self, challenge, name):
+    """
+    _get_token: answer the WWW-Authenticate challenge of the registry.
+    :param challenge: (str) the WWW-Authenticate header.
+    :param name: (str) the repository name.
+    :return: (str) the Authorization header
+    """
+    scheme, _, params = challenge.partition(" ")
+    credentials = None
+    if "username" in self.auth_config:
+      credentials = (self.auth_config["username"], self.auth_config.get("password", ""))
+    if scheme.lower() == "basic":
+      if credentials is None:
+        return None
+      return "Basic " + base64.b64encode(":".join(credentials).encode("utf-8")).decode("ascii")
+    fields = dict()
+    for field in params.split(","):
+      key, _, value = field.strip().partition("=")
+      fields[key] = value.strip('"')
+    response = self.session.get(
+      fields["realm"],
+      params={"service": fields.get("service", ""), "scope": f"repository:{name}:pull,push"},
+      auth=credentials,
+      timeout=self.TIMEOUT
+    )
+    response.raise_for_status()
+    token = response.json().get("token") or response.json().get("access_token")
+    return f"Bearer {token}"
+
+  def _request(self, method, name, path, **kwargs):
+    url = f"{self.base_url}/v2/{name}/{path}"
+    headers = kwargs.pop("headers", dict())
+    with self._lock:
+      authorization = self._tokens.get(name)
+    if authorization is not None:
+      headers["Authorization"] = authorization
+    response = self.session.request(method, url, headers=headers, timeout=self.TIMEOUT, **kwargs)
+    if response.status_code == 401 and "WWW-Authenticate" in response.headers:
+      authorization = self._get_token(response.headers["WWW-Authenticate"], name)
+      if authorization is not None:
+        with self._lock:
+          self._tokens[name] = authorization
+        headers["Authorization"] = authorization
+        response = self.session.request(method, url, headers=headers, timeout=self.TIMEOUT, **kwargs)
+    return response
+
+  def manifest_digest(self, repo, reference):
+    """
+    manifest_digest: the digest of the manifest, with a HEAD request.
+    :param repo: (str) the repository.
+    :param reference: (str) a tag or a digest.
+    :return: (str) the digest, or None when the registry doesn't have it
+    """
+    response = self._request("HEAD", self.get_name(repo), f"manifests/{reference}", headers={"Accept": MANIFEST_TYPES})
+    if response.status_code == 404:
+      return None
+    response.raise_for_status()
+    return response.headers.get("Docker-Content-Digest")
+
+  def retag(self, repo, digest, tag):
+    """
+    retag: point the tag at a manifest the registry already has, without pushing any layers.
+    :param repo: (str) the repository.
+    :param digest: (str) the digest of the manifest.
+    :param tag: (str) the tag.
+    :return: None
+    """
+    name = self.get_name(repo)
+    response = self._request("GET", name, f"manifests/{digest}", headers={"Accept": MANIFEST_TYPES})
+    response.raise_for_status()
+    response = self._request(
+      "PUT",
+      name,
+      f"manifests/{tag}",
+      data=response.content,
+      headers={"Content-Type": response.headers["Content-Type"]}
+    )
+    response.raise_for_status()
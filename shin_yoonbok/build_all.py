@@ -0,0 +1,22 @@
+import sys
+from BuildGraph import BuildGraph
+
+
+if __name__ == "__main__":
+  args = BuildGraph.parse_args(system_args=sys.argv[1:])
+  graph = BuildGraph(
+    root_dir=args.root_dir,
+    dockerfile=args.file,
+    workers=args.jobs,
+    push=args.push,
+    debug=args.debug,
+    additional_tags=args.tags,
+    push_workers=args.push_workers,
+    rebuild=args.rebuild,
+    force_push=args.force_push
+  )
+  print(graph)
+  results = graph.build_all()
+  graph.show_results()
+  if not all(result["status"] == "built" for result in results.values()):
+    sys.exit(1)
@@ -8,10 +8,19 @@ if __name__ == "__main__":
     work_dir=args.work_dir,
     dockerfile=args.file,
     debug=args.debug,
-    additional_tags=args.tags
+    additional_tags=args.tags,
+    push_workers=args.push_workers,
+    registry_limit=args.registry_limit,
+    rebuild=args.rebuild,
+    build_report=args.build_report,
+    compress_context=args.compress,
+    docker_host=args.docker_host,
+    force_push=args.force_push
   )
   print(builder)
   new_image = builder.build_image()
   builder.tag_image(target_image=new_image)
   builder.show_built_image(target_image=new_image)
-  builder.push_image()
+  push_results = builder.push_image(target_image=new_image)
+  if not all(result["ok"] for result in push_results):
+    sys.exit(1)
@@ -0,0 +1,155 @@
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import threading
+import types
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ContextPacker import ContextPacker
+from ImageBuilder import ImageBuilder
+
+
+class FakeDocker(BaseHTTPRequestHandler):
+  """
+  FakeDocker: the part of the engine API build_image needs, it keeps every build context it's sent.
+  """
+  protocol_version = "HTTP/1.1"
+  contexts = list()
+
+  def log_message(self, *args):
+    pass
+
+  def _answer(self, body):
+    body = body.encode()
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def _read_body(self):
+    if self.headers.get("Transfer-Encoding") != "chunked":
+      return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+    body = bytearray()
+    while True:
+      size = int(self.rfile.readline().split(b";")[0], 16)
+      if size == 0:
+        self.rfile.readline()
+        return bytes(body)
+      body += self.rfile.read(size)
+      self.rfile.readline()
+
+  def do_GET(self):
+    if self.path == "/version":
+      self._answer(json.dumps({"ApiVersion": "1.41", "Version": "20.10.0"}))
+      return
+    image_id = re.match(r"^/v[\d.]+/images/(?P<id>.+)/json$", self.path).group("id")
+    self._answer(json.dumps({"Id": image_id}))
+
+  def do_POST(self):
+    self.contexts.append((self.headers.get("Content-Encoding"), self._read_body()))
+    events = (
+      {"stream": "Step 1/1 : FROM scratch\n"},
+      {"aux": {"ID": "sha256:built"}},
+      {"stream": "Successfully built built\n"},
+    )
+    # the build output is streamed, one chunk per event, the way the daemon does it.
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Transfer-Encoding", "chunked")
+    self.end_headers()
+    for event in events:
+      chunk = (json.dumps(event) + "\n").encode()
+      self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+    self.wfile.write(b"0\r\n\r\n")
+
+
+class TestContextPacker(unittest.TestCase):
+  """
+  TestContextPacker: the context build_image streams to the endpoint is a tar of what .dockerignore
+  lets through, plain or gzipped, and the packer keeps count of it.
+  """
+  FILES = {
+    "Dockerfile": b"FROM scratch\nCOPY app /app\n",
+    ".dockerignore": b"*.log\nsecret/\n",
+    "README": b"hello\n",
+    "app/main.py": b"print('hello')\n",
+    "app/data.bin": os.urandom(3 << 20),
+    "assets/logo.png": os.urandom(1 << 20),
+    "build.log": b"ignored\n",
+    "secret/key": b"ignored\n",
+  }
+  PACKED = {"Dockerfile", ".dockerignore", "README", "app", "app/main.py", "app/data.bin", "assets", "assets/logo.png"}
+
+  def setUp(self):
+    self.work_dir = tempfile.mkdtemp()
+    self.cache_dir = tempfile.mkdtemp()
+    for rel_path, content in self.FILES.items():
+      os.makedirs(os.path.dirname(os.path.join(self.work_dir, rel_path)), exist_ok=True)
+      with open(os.path.join(self.work_dir, rel_path), "wb") as file_fh:
+        file_fh.write(content)
+    self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDocker)
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    FakeDocker.contexts = list()
+    sys.modules["config"] = types.SimpleNamespace(DOCKER_DTR_BASE=["localhost:5000/team"])
+
+  def tearDown(self):
+    del sys.modules["config"]
+    self.server.shutdown()
+    self.server.server_close()
+    shutil.rmtree(self.work_dir)
+    shutil.rmtree(self.cache_dir)
+
+  def build(self, compress):
+    builder = ImageBuilder(
+      work_dir=self.work_dir,
+      cache_file=os.path.join(self.cache_dir, "build_cache.json"),
+      docker_host=f"tcp://127.0.0.1:{self.server.server_port}",
+      compress_context=compress,
+      rebuild=True
+    )
+    image = builder.build_image()
+    self.assertEqual(image.id, "sha256:built")
+    self.assertEqual(len(FakeDocker.contexts), 1)
+    return FakeDocker.contexts[0]
+
+  def check_archive(self, archive):
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar_fh:
+      self.assertEqual(set(tar_fh.getnames()), self.PACKED)
+      for member in tar_fh.getmembers():
+        self.assertEqual((member.uid, member.gid), (0, 0))
+        if member.isfile():
+          self.assertEqual(tar_fh.extractfile(member).read(), self.FILES[member.name])
+
+  def test_build_sends_the_context(self):
+    encoding, archive = self.build(compress=False)
+    self.assertIsNone(encoding)
+    self.check_archive(archive)
+
+  def test_build_sends_the_context_gzipped(self):
+    encoding, archive = self.build(compress=True)
+    self.assertEqual(encoding, "gzip")
+    self.assertEqual(archive[:2], b"\x1f\x8b")
+    self.check_archive(gzip.decompress(archive))
+
+  def test_counts(self):
+    packer = ContextPacker(work_dir=self.work_dir, top=2)
+    archive = b"".join(packer.stream())
+    self.check_archive(archive)
+    self.assertEqual(packer.archive_size, len(archive))
+    self.assertEqual(packer.files, len([p for p in self.PACKED if p in self.FILES]))
+    app_size = len(self.FILES["app/data.bin"]) + len(self.FILES["app/main.py"])
+    self.assertEqual(packer.largest_dirs(), [(app_size, "app"), (1 << 20, "assets")])
+    self.assertEqual(packer.largest_paths()[0], (3 << 20, "app/data.bin"))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,193 @@
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ImageBuilder import ImageBuilder
+from RegistryClient import RegistryClient
+
+
+MANIFEST_TYPE = "application/vnd.docker.distribution.manifest.v2+json"
+
+
+class FakeRegistry(BaseHTTPRequestHandler):
+  """
+  FakeRegistry: the part of the v2 API RegistryClient talks to, manifests by digest and by tag.
+  """
+  protocol_version = "HTTP/1.1"
+  manifests = dict()
+  tags = dict()
+  puts = list()
+  stall = 0.0
+
+  def log_message(self, *args):
+    pass
+
+  def _lookup(self):
+    time.sleep(self.stall)
+    reference = self.path.rsplit("/", 1)[1]
+    digest = self.tags.get(reference, reference)
+    return digest if digest in self.manifests else None
+
+  def _answer(self, status, headers=None, body=b""):
+    self.send_response(status)
+    for key, value in (headers or dict()).items():
+      self.send_header(key, value)
+    self.send_header("Content-Length", str(len(body)))
+    try:
+      self.end_headers()
+      self.wfile.write(body)
+    except (BrokenPipeError, ConnectionResetError):
+      # the client gave up on a stalled answer.
+      pass
+
+  def do_HEAD(self):
+    digest = self._lookup()
+    if digest is None:
+      self._answer(404)
+    else:
+      self._answer(200, {"Docker-Content-Digest": digest})
+
+  def do_GET(self):
+    digest = self._lookup()
+    if digest is None:
+      self._answer(404)
+    else:
+      self._answer(200, {"Docker-Content-Digest": digest, "Content-Type": MANIFEST_TYPE}, self.manifests[digest])
+
+  def do_PUT(self):
+    body = self.rfile.read(int(self.headers["Content-Length"]))
+    tag = self.path.rsplit("/", 1)[1]
+    self.tags[tag] = next(d for d, m in self.manifests.items() if m == body)
+    self.puts.append(tag)
+    self._answer(201)
+
+
+class FakeDocker(BaseHTTPRequestHandler):
+  """
+  FakeDocker: the part of the engine API push_image needs, the image and docker push.
+  """
+  protocol_version = "HTTP/1.1"
+  images = dict()
+  pushes = list()
+
+  def log_message(self, *args):
+    pass
+
+  def _answer(self, body):
+    body = body.encode()
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def do_GET(self):
+    if self.path == "/version":
+      self._answer(json.dumps({"ApiVersion": "1.41", "Version": "20.10.0"}))
+      return
+    image_id = re.match(r"^/v[\d.]+/images/(?P<id>.+)/json$", self.path).group("id")
+    self._answer(json.dumps(self.images[image_id]))
+
+  def do_POST(self):
+    push = re.match(r"^/v[\d.]+/images/(?P<repo>.+)/push\?tag=(?P<tag>[^&]+)", self.path)
+    self.rfile.read(int(self.headers.get("Content-Length", 0)))
+    self.pushes.append((push.group("repo"), push.group("tag")))
+    self._answer(json.dumps({"status": "Pushed"}) + "\n")
+
+
+class TestRegistryClient(unittest.TestCase):
+  """
+  TestRegistryClient: push_image skips the tags the registry has, retags the ones whose manifest
+  it has, pushes the rest, and falls back to pushing when the registry stalls.
+  """
+  def setUp(self):
+    self.work_dir = tempfile.mkdtemp()
+    with open(os.path.join(self.work_dir, "Dockerfile"), "w") as dockerfile_fh:
+      dockerfile_fh.write("FROM scratch\n")
+    self.servers = list()
+    registry_port = self.serve(FakeRegistry)
+    docker_port = self.serve(FakeDocker)
+    self.registry = f"localhost:{registry_port}"
+    FakeRegistry.manifests = {"sha256:aaa": b'{"layers": ["a"]}', "sha256:bbb": b'{"layers": ["b"]}'}
+    FakeRegistry.tags = {"latest": "sha256:aaa"}
+    FakeRegistry.puts = list()
+    FakeRegistry.stall = 0.0
+    FakeDocker.pushes = list()
+    self.repo = f"{self.registry}/team/{os.path.basename(self.work_dir)}"
+    FakeDocker.images = {"sha256:img": {"Id": "sha256:img", "RepoDigests": [f"{self.repo}@sha256:aaa"]}}
+    self.timeout = RegistryClient.TIMEOUT
+    RegistryClient.TIMEOUT = (0.5, 0.5)
+    os.environ["DOCKER_CONFIG"] = self.work_dir
+    sys.modules["config"] = types.SimpleNamespace(DOCKER_DTR_BASE=[f"{self.registry}/team"])
+    self.builder = ImageBuilder(
+      work_dir=self.work_dir,
+      cache_file=os.path.join(self.work_dir, "build_cache.json"),
+      docker_host=f"tcp://127.0.0.1:{docker_port}",
+      additional_tags=["v1"],
+      push_workers=2
+    )
+
+  def tearDown(self):
+    RegistryClient.TIMEOUT = self.timeout
+    del os.environ["DOCKER_CONFIG"]
+    del sys.modules["config"]
+    for server in self.servers:
+      server.shutdown()
+      server.server_close()
+    shutil.rmtree(self.work_dir)
+
+  def serve(self, handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    self.servers.append(server)
+    return server.server_port
+
+  def test_manifest_digest_and_retag(self):
+    client = RegistryClient(self.registry)
+    self.assertEqual(client.manifest_digest(self.repo, "latest"), "sha256:aaa")
+    self.assertIsNone(client.manifest_digest(self.repo, "nope"))
+    client.retag(self.repo, "sha256:bbb", "v2")
+    self.assertEqual(client.manifest_digest(self.repo, "v2"), "sha256:bbb")
+
+  def test_push_image_skips_and_retags(self):
+    results = self.builder.push_image(target_image=self.builder.dc.images.get("sha256:img"))
+    actions = {r["tag"]: r["action"] for r in results}
+    self.assertEqual(actions.pop("latest"), "skipped")
+    self.assertEqual(set(actions.values()), {"retagged"})
+    self.assertEqual(sorted(FakeRegistry.puts), sorted(actions))
+    self.assertEqual(FakeDocker.pushes, [])
+    self.assertTrue(all(r["ok"] for r in results))
+
+  def test_push_image_pushes_what_the_registry_lacks(self):
+    FakeDocker.images["sha256:img"]["RepoDigests"] = [f"{self.repo}@sha256:ccc"]
+    results = self.builder.push_image(target_image=self.builder.dc.images.get("sha256:img"))
+    self.assertEqual({r["action"] for r in results}, {"pushed"})
+    self.assertEqual(len(FakeDocker.pushes), len(results))
+
+  def test_push_image_falls_back_when_the_registry_stalls(self):
+    FakeRegistry.stall = 2.0
+    start = time.monotonic()
+    results = self.builder.push_image(target_image=self.builder.dc.images.get("sha256:img"))
+    self.assertEqual({r["action"] for r in results}, {"pushed"})
+    self.assertEqual(len(FakeDocker.pushes), len(results))
+    # once the registry timed out, the other tags don't wait on it again.
+    self.assertLess(time.monotonic() - start, 2.0)
+
+  def test_force_push_skips_the_registry(self):
+    self.builder.force_push = True
+    results = self.builder.push_image(target_image=self.builder.dc.images.get("sha256:img"))
+    self.assertEqual({r["action"] for r in results}, {"pushed"})
+    self.assertEqual(FakeRegistry.puts, [])
+
+
+if __name__ == "__main__":
+  unittest.main()